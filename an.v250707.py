@@ -2,23 +2,2253 @@ import tkinter as tk
 from tkinter import messagebox, PanedWindow, filedialog, Toplevel, font, ttk
 import json
 import os
+import re
+import codecs
 import configparser
+import time
+import threading
+import queue
+import heapq
+import hashlib
+import bisect
+import functools
+import importlib.util
+import itertools
+import io
+
+# 시작 시간 측정의 기준점
+STARTUP_STARTED = time.perf_counter()
 
 # 엑셀 파일 처리를 위한 라이브러리. 설치 필요 (pip install openpyxl)
-try:
-    import openpyxl
-except ImportError:
-    openpyxl = None
+# 불러오는 데 시간이 오래 걸리므로 시작할 때가 아니라 Excel 파일을 처음 다룰 때 불러옵니다.
+def openpyxl_available():
+    return importlib.util.find_spec("openpyxl") is not None
+
+@functools.lru_cache(maxsize=None)
+def load_openpyxl():
+    """ openpyxl 모듈을 불러와 돌려줍니다. 설치되어 있지 않으면 None을 돌려줍니다. """
+    try:
+        import openpyxl
+    except ImportError:
+        return None
+    return openpyxl
+
+EXPORT_BUFFER_SIZE = 1 << 20
+# 가져오기 작업이 진행률과 취소 여부를 확인하는 간격(메모 수)
+IMPORT_BATCH_SIZE = 1000
+# 되돌리기로 기억해 두는 메모 목록 작업(여러 메모 지우기, 복제, 옮기기)의 수
+UNDO_LIMIT = 20
+CONTENT_CHUNK_SIZE = 64 * 1024
+CONTENT_PAGE_SIZE = 512 * 1024
+# 메모 내용에서 한 번에 강조하는 검색 결과의 최대 수
+SEARCH_HIGHLIGHT_LIMIT = 1000
+# settings.ini [Storage] compression 값. 불러올 때는 설정과 상관없이 파일 앞부분을 보고 형식을 알아냅니다.
+STORAGE_COMPRESSIONS = ("none", "zlib", "gzip", "lzma")
+
+class Memo:
+    """ 메모 한 개. 메모가 아주 많을 때 메모리를 아끼도록 딕셔너리 대신 __slots__ 객체를 씁니다.
+
+    id는 실행 중에만 쓰는 고유 번호로 검색 색인과 위치표의 키가 됩니다. created/modified는 유닉스 시간(초)이며
+    모르면 None입니다. uid는 파일에 남는 고유 이름으로 수정 기록을 찾는 데 쓰며, 처음 기록할 때 만듭니다.
+    파일에는 to_dict()로 기존과 같은 {"title", "content"} 모양으로 쓰고, 나머지는 있을 때만 덧붙입니다.
+    편집은 필드를 제자리에서 고칩니다.
+    """
+    __slots__ = ("id", "uid", "title", "content", "created", "modified")
+    ids = itertools.count(1)
+
+    def __init__(self, title, content, created=None, modified=None, uid=None):
+        self.id = next(Memo.ids)
+        self.uid = uid
+        self.title = title
+        self.content = content
+        self.created = created
+        self.modified = modified
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["title"], data["content"], data.get("created"), data.get("modified"), data.get("uid"))
+
+    def to_dict(self):
+        data = {"title": self.title, "content": self.content}
+        if self.created is not None:
+            data["created"] = self.created
+        if self.modified is not None:
+            data["modified"] = self.modified
+        if self.uid is not None:
+            data["uid"] = self.uid
+        return data
+
+    def ensure_uid(self):
+        if self.uid is None:
+            self.uid = os.urandom(8).hex()
+        return self.uid
+
+    def touch(self):
+        """ 수정 시간을 지금으로 바꿉니다. """
+        self.modified = int(time.time())
+
+def has_long_line(text, limit):
+    """ text에 limit 글자 이상인 줄이 있는지 봅니다. 줄마다 길이만 재므로 text 길이에 비례하는 시간이 듭니다. """
+    if len(text) < limit: return False
+    return max(map(len, text.split("\n"))) >= limit
+
+def split_pages(text, page_size):
+    """ text를 page_size 글자 안팎의 쪽으로 나눈 (시작, 끝) 목록을 돌려줍니다. 가능하면 줄 끝에서 자릅니다. """
+    pages = []
+    start = 0
+    while start < len(text):
+        end = start + page_size
+        if end < len(text):
+            newline = text.rfind("\n", start, end)
+            if newline > start:
+                end = newline + 1
+        else:
+            end = len(text)
+        pages.append((start, end))
+        start = end
+    return pages
+
+def block_start(indices, target):
+    """ move_block(items, indices, target) 뒤에 옮긴 묶음이 시작하는 자리 """
+    return target - bisect.bisect_left(indices, target)
+
+def move_block(items, indices, target):
+    """ items에서 indices(오름차순) 자리의 항목들을 순서대로 모아, 옮기기 전 기준 target 자리 앞으로 옮깁니다.
+
+    옮긴 항목과 target 사이 구간만 다시 만들므로 비용은 목록 길이가 아니라 옮긴 거리에 비례합니다.
+    옮긴 묶음이 시작하는 자리를 돌려줍니다.
+    """
+    low = min(indices[0], target)
+    high = max(indices[-1] + 1, target)
+    picked = set(indices)
+    moved = [items[i] for i in indices]
+    head = [items[i] for i in range(low, target) if i not in picked]
+    tail = [items[i] for i in range(target, high) if i not in picked]
+    items[low:high] = head + moved + tail
+    return low + len(head)
+
+def write_json_array(f, items, on_item=None, compact=False):
+    """ json.dump(items, f, ensure_ascii=False, indent=4)와 같은 모양으로 항목을 하나씩 씁니다.
+
+    items는 리스트가 아니어도 되며, 한 번에 항목 하나만 직렬화하므로 메모리 사용량이 항목 크기를 넘지 않습니다.
+    on_item(i)는 항목을 쓸 때마다 호출됩니다. compact이면 separators=(",", ":")처럼 공백 없이 씁니다.
+    """
+    f.write("[")
+    empty = True
+    for i, item in enumerate(items):
+        if compact:
+            if not empty:
+                f.write(",")
+            f.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+        else:
+            f.write("\n    " if empty else ",\n    ")
+            f.write(json.dumps(item, ensure_ascii=False, indent=4).replace("\n", "\n    "))
+        empty = False
+        if on_item:
+            on_item(i)
+    f.write("]" if empty or compact else "\n]")
+
+class ZlibWriter(io.RawIOBase):
+    """ 쓰는 바이트를 zlib으로 압축해 바이너리 파일 f에 씁니다. 닫을 때 남은 압축 데이터를 내보내고 f도 닫습니다. """
+    def __init__(self, f, level):
+        import zlib
+        self.f = f
+        self.compressor = zlib.compressobj(level)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.f.write(self.compressor.compress(data))
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.f.write(self.compressor.flush())
+            self.f.close()
+        super().close()
+
+def open_snapshot_writer(path, compression, level):
+    """ 메모 스냅샷을 쓸 텍스트 파일을 엽니다. compression이 none이 아니면 쓰는 내용을 그 형식으로 압축합니다. """
+    # 압축 모듈은 압축 형식을 쓸 때만 필요하므로 여기서 불러옵니다.
+    if compression == "gzip":
+        import gzip
+        return gzip.open(path, "wt", compresslevel=level, encoding="utf-8")
+    if compression == "lzma":
+        import lzma
+        return lzma.open(path, "wt", preset=level, encoding="utf-8")
+    if compression == "zlib":
+        raw = ZlibWriter(open(path, "wb"), level)
+        return io.TextIOWrapper(io.BufferedWriter(raw, EXPORT_BUFFER_SIZE), encoding="utf-8")
+    return open(path, "w", encoding="utf-8", buffering=EXPORT_BUFFER_SIZE)
+
+def decompress_snapshot(data):
+    """ 스냅샷 파일의 바이트를 앞부분의 표식으로 형식을 알아내 풀어 돌려줍니다. 압축되지 않았으면 그대로 돌려줍니다.
+
+    JSON은 '['나 공백으로 시작하므로 gzip(1f 8b), xz(fd 37 7a 58 5a 00), zlib(78 ..) 머리와 겹치지 않습니다.
+    압축이 깨졌으면 ValueError를 발생시킵니다.
+    """
+    try:
+        if data[:2] == b"\x1f\x8b":
+            import gzip
+            return gzip.decompress(data)
+        if data[:6] == b"\xfd7zXZ\x00":
+            import lzma
+            return lzma.decompress(data)
+        if len(data) >= 2 and data[0] == 0x78 and (data[0] << 8 | data[1]) % 31 == 0:
+            import zlib
+            return zlib.decompress(data)
+    except Exception as e:
+        # 형식마다 예외 종류가 달라(zlib.error, lzma.LZMAError, EOFError 등) 한데 묶습니다.
+        raise ValueError(f"압축된 메모 파일을 풀 수 없습니다: {e}") from e
+    return data
+
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+JSON_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+def iter_json_array(f, on_read=None, chunk_size=1 << 16):
+    """ 바이너리 파일 f에서 최상위 JSON 배열을 항목 하나씩 읽어 돌려줍니다.
+
+    파일 전체를 읽지 않고 chunk_size씩 읽어 가며 json.JSONDecoder.raw_decode로 항목을 잘라 내므로,
+    메모리에는 아직 처리하지 않은 부분만 남습니다. on_read(n)은 n바이트를 읽을 때마다 호출됩니다.
+    내용이 비어 있으면 EOFError, 최상위 값이 배열이 아니면 TypeError, 문법 오류는 json.JSONDecodeError를 발생시킵니다.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    state = {"buf": "", "pos": 0, "eof": False}
+
+    def read_more(min_size=0):
+        data = f.read(max(chunk_size, min_size))
+        if on_read:
+            on_read(len(data))
+        state["eof"] = not data
+        state["buf"] = state["buf"][state["pos"]:] + text_decoder.decode(data, final=state["eof"])
+        state["pos"] = 0
+        return not state["eof"]
+
+    def skip_whitespace():
+        while True:
+            state["pos"] = JSON_WHITESPACE.match(state["buf"], state["pos"]).end()
+            if state["pos"] < len(state["buf"]) or not read_more():
+                return state["pos"] < len(state["buf"])
+
+    def next_char():
+        if not skip_whitespace():
+            raise json.JSONDecodeError("Unexpected end of data", state["buf"], state["pos"])
+        ch = state["buf"][state["pos"]]
+        state["pos"] += 1
+        return ch
+
+    if not skip_whitespace():
+        raise EOFError("파일이 비어있습니다.")
+    if state["buf"][state["pos"]] != "[":
+        raise TypeError("데이터가 리스트 형식이 아닙니다.")
+    state["pos"] += 1
+    if next_char() != "]":
+        state["pos"] -= 1
+        while True:
+            while True:
+                try:
+                    item, end = decoder.raw_decode(state["buf"], state["pos"])
+                except json.JSONDecodeError:
+                    if state["eof"]: raise
+                else:
+                    # 숫자는 버퍼 끝에서 잘렸어도 해석되므로, 뒤에 구분 문자가 보일 때까지 더 읽어서 확인합니다.
+                    truncated = (type(item) in (int, float)
+                                 and JSON_NUMBER_TAIL.fullmatch(state["buf"], end) is not None)
+                    if not truncated or state["eof"]: break
+                # 큰 항목일수록 한 번에 더 많이 읽어 다시 해석하는 횟수를 줄입니다.
+                read_more(len(state["buf"]) - state["pos"])
+            state["pos"] = end
+            yield item
+            ch = next_char()
+            if ch == "]": break
+            if ch != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", state["buf"], state["pos"] - 1)
+            skip_whitespace()
+    if skip_whitespace():
+        raise json.JSONDecodeError("Extra data", state["buf"], state["pos"])
+
+FOLDER_IMPORT_EXTENSIONS = (".txt", ".md")
+
+def read_text_file(path):
+    """ 텍스트 파일을 읽어 UTF-8(BOM 포함)로, 안 되면 CP949로 디코드합니다. 줄바꿈은 \n으로 맞춥니다. """
+    with open(path, "rb") as f:
+        data = f.read()
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        text = data.decode("utf-8", errors="replace")
+    return text.replace("\r\n", "\n")
+
+def memo_from_text_file(path):
+    """ 파일 하나를 메모로 바꿉니다. 첫 줄이 마크다운 제목(#)이면 그것을, 아니면 파일 이름을 제목으로 씁니다.
+    내용이 비어 있으면 None을 돌려줍니다. """
+    text = read_text_file(path)
+    if not text.strip():
+        return None
+    title = os.path.splitext(os.path.basename(path))[0]
+    first_line = text.lstrip().partition("\n")[0].strip()
+    if first_line.startswith("#"):
+        title = first_line.lstrip("#").strip() or title
+    return Memo(title, text)
+
+def memo_digest(title, content):
+    """ 제목과 내용을 합친 해시값을 돌려줍니다. 병합할 때 같은 메모인지 O(1)로 확인하는 데 씁니다. """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(title.encode("utf-8"))
+    h.update(b"\0")
+    h.update(content.encode("utf-8"))
+    return h.digest()
+
+BACKUP_MANIFEST = "manifest.json"
+BACKUP_FORMAT = "alpaca-memo-backup"
+
+def build_backup_delta(previous, memos, digests):
+    """ 이전 백업의 해시 목록 previous와 비교해 memos의 변경분 항목 목록을 만듭니다.
+
+    항목은 이전 상태에서 그대로 가져올 구간 [시작, 길이] 또는 새로 쓰는 메모의 딕셔너리입니다.
+    현재 메모의 해시는 digests에 순서대로 채웁니다. 돌려주는 값: (항목 목록, 추가·변경된 메모 수)
+    """
+    position = {}
+    for i, digest in enumerate(previous):
+        position.setdefault(digest, i)
+    items = []
+    added = 0
+    run = None
+    for memo in memos:
+        digest = memo_digest(memo.title, memo.content).hex()
+        digests.append(digest)
+        if run is not None and run[0] + run[1] < len(previous) and previous[run[0] + run[1]] == digest:
+            run[1] += 1
+        elif digest in position:
+            run = [position[digest], 1]
+            items.append(run)
+        else:
+            run = None
+            items.append(memo.to_dict())
+            added += 1
+    return items, added
+
+def apply_backup_delta(memos, delta):
+    """ build_backup_delta로 만든 변경분을 이전 메모 목록에 적용해 새 목록을 돌려줍니다.
+
+    같은 메모(예: 빈 새 메모 여러 개)는 같은 이전 구간을 가리킬 수 있으므로, 이미 넣은 메모 객체는 복사해서 넣습니다.
+    복사본은 수정 기록이 섞이지 않도록 새 uid를 받습니다.
+    """
+    restored = []
+    placed = set()
+    for item in delta["items"]:
+        if isinstance(item, list):
+            start, length = item
+            for memo in memos[start:start + length]:
+                if memo.id in placed:
+                    memo = Memo.from_dict(memo.to_dict())
+                    memo.uid = None
+                placed.add(memo.id)
+                restored.append(memo)
+        else:
+            restored.append(Memo.from_dict(item))
+    if len(restored) != delta["count"]:
+        raise ValueError("백업 변경분을 적용한 메모 수가 기록과 다릅니다.")
+    return restored
+
+def line_delta(old, new):
+    """ old에서 new로 가는 줄 단위 변경 목록 [[시작 줄, 끝 줄, [새 줄, ...]], ...]을 돌려줍니다. """
+    # 수정 기록을 남길 때만 필요하므로 여기서 불러옵니다.
+    import difflib
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    return [[i1, i2, b[j1:j2]] for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b).get_opcodes() if tag != "equal"]
+
+def apply_line_delta(old, delta):
+    """ line_delta로 만든 변경 목록을 old에 적용한 내용을 돌려줍니다. """
+    lines = old.splitlines(keepends=True)
+    result = []
+    position = 0
+    for start, end, new_lines in delta:
+        result.extend(lines[position:start])
+        result.extend(new_lines)
+        position = end
+    result.extend(lines[position:])
+    return "".join(result)
+
+class MemoHistory:
+    """ 메모별 수정 기록. memos.json과 따로 기록 폴더에 메모 하나당 <uid>.jsonl 파일 하나를 둡니다.
+
+    한 줄이 한 판이며, keyframe_interval판마다 전체 내용("text")을, 그 사이에는 앞 판에 대한 줄 단위 변경("delta")을 씁니다.
+    판 수가 max_revisions를 넘거나 파일이 max_bytes를 넘으면 오래된 판부터 지우고, 남은 첫 판을 전체 내용으로 바꿉니다.
+    record는 작업 스레드에서, revisions와 rebuild는 어느 스레드에서나 부를 수 있습니다.
+    """
+    def __init__(self, folder, max_revisions=100, max_bytes=1 << 20, keyframe_interval=20):
+        self.folder = folder
+        self.max_revisions = max_revisions
+        self.max_bytes = max_bytes
+        self.keyframe_interval = keyframe_interval
+        # uid -> 마지막 판의 상태. 매번 파일을 다시 읽지 않도록 한 번 읽은 메모는 기억해 둡니다.
+        self.tails = {}
+
+    def path(self, uid):
+        return os.path.join(self.folder, uid + ".jsonl")
+
+    def revisions(self, uid):
+        """ 판 목록을 오래된 것부터 돌려줍니다. 쓰는 중인 마지막 줄처럼 읽을 수 없는 줄은 건너뜁니다. """
+        revisions = []
+        try:
+            with open(self.path(uid), "rb") as f:
+                for line in f:
+                    try:
+                        revisions.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return revisions
+
+    @staticmethod
+    def rebuild(revisions, index):
+        """ index번째 판의 내용을 만듭니다. 가장 가까운 앞쪽 전체 내용에서 시작해 그 뒤 변경만 차례로 적용합니다. """
+        start = index
+        while "text" not in revisions[start]:
+            start -= 1
+        text = revisions[start]["text"]
+        for revision in revisions[start + 1:index + 1]:
+            text = apply_line_delta(text, revision["delta"])
+        return text
+
+    def versions(self, uid):
+        """ 판마다 (판 번호, 시간, 제목, 내용)을 오래된 것부터 돌려줍니다. 변경을 앞에서부터 한 번씩만 적용합니다. """
+        versions = []
+        text = None
+        for revision in self.revisions(uid):
+            if "text" in revision:
+                text = revision["text"]
+            elif text is None:
+                continue
+            else:
+                text = apply_line_delta(text, revision["delta"])
+            versions.append((revision["rev"], revision.get("time"), revision["title"], text))
+        return versions
+
+    def record_all(self, items):
+        """ 작업 스레드에서 (uid, 제목, 내용, 시간, 고치기 전) 목록을 차례로 기록합니다. """
+        for uid, title, content, timestamp, before in items:
+            self.record(uid, title, content, timestamp, before)
+
+    def tail(self, uid):
+        if uid not in self.tails:
+            revisions = self.revisions(uid)
+            if not revisions:
+                return None
+            last = len(revisions) - 1
+            since_keyframe = last - max(i for i, r in enumerate(revisions) if "text" in r)
+            self.tails[uid] = {
+                "rev": revisions[last]["rev"], "since_keyframe": since_keyframe, "count": len(revisions),
+                "title": revisions[last]["title"], "text": self.rebuild(revisions, last),
+                "size": os.path.getsize(self.path(uid)),
+            }
+        return self.tails[uid]
+
+    def record(self, uid, title, content, timestamp, before=None):
+        """ 새 판을 덧붙입니다. 기록이 없는 메모면 before(고치기 전의 (제목, 내용, 시간))를 첫 판으로 먼저 남깁니다. """
+        tail = self.tail(uid)
+        if tail is None and before is not None and before[:2] != (title, content):
+            self.append(uid, before[0], before[1], before[2])
+            tail = self.tails[uid]
+        if tail is not None and tail["title"] == title and tail["text"] == content:
+            return
+        self.append(uid, title, content, timestamp)
+        tail = self.tails[uid]
+        if tail["count"] > self.max_revisions + self.keyframe_interval or tail["size"] > self.max_bytes:
+            self.trim(uid)
+
+    def append(self, uid, title, content, timestamp):
+        tail = self.tails.get(uid)
+        revision = {"rev": tail["rev"] + 1 if tail else 1, "time": timestamp, "title": title}
+        if tail is None or tail["since_keyframe"] + 1 >= self.keyframe_interval:
+            revision["text"] = content
+        else:
+            delta = line_delta(tail["text"], content)
+            # 거의 다 바뀌었으면 변경 목록보다 전체 내용이 작습니다.
+            if sum(len(line) for _, _, lines in delta for line in lines) >= len(content):
+                revision["text"] = content
+            else:
+                revision["delta"] = delta
+        data = (json.dumps(revision, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        os.makedirs(self.folder, exist_ok=True)
+        with open(self.path(uid), "ab") as f:
+            f.write(data)
+        self.tails[uid] = {
+            "rev": revision["rev"], "since_keyframe": 0 if "text" in revision else tail["since_keyframe"] + 1,
+            "count": tail["count"] + 1 if tail else 1, "title": title, "text": content,
+            "size": (tail["size"] if tail else 0) + len(data),
+        }
+
+    def trim(self, uid):
+        """ 오래된 판을 지웁니다. 판 수는 max_revisions까지, 크기는 max_bytes의 3/4까지 줄여 매번 다시 쓰지 않게 합니다. """
+        revisions = self.revisions(uid)
+        first = max(0, len(revisions) - self.max_revisions)
+        lines = [(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8") for r in revisions]
+        size = sum(len(line) for line in lines[first:])
+        while first < len(revisions) - 1 and size > self.max_bytes * 3 // 4:
+            size -= len(lines[first])
+            first += 1
+        if "text" not in revisions[first]:
+            keyframe = {key: value for key, value in revisions[first].items() if key != "delta"}
+            keyframe["text"] = self.rebuild(revisions, first)
+            lines[first] = (json.dumps(keyframe, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        temp_path = self.path(uid) + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.writelines(lines[first:])
+        os.replace(temp_path, self.path(uid))
+        self.tails.pop(uid, None)
+
+class JobCancelled(Exception):
+    """ 사용자가 작업을 취소했을 때 작업 함수 안에서 발생합니다. """
+
+class IOJob:
+    """ IOWorker에서 실행되는 작업 하나. 진행률 보고와 취소 확인을 제공합니다. """
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, worker, func, seq, key=None):
+        self.worker = worker
+        self.func = func
+        self.seq = seq
+        self.key = key
+        self.cancel_event = threading.Event()
+        self.last_progress = 0.0
+        # 아래 콜백은 모두 UI 스레드에서 호출됩니다.
+        self.on_done = None
+        self.on_error = None
+        self.on_progress = None
+        self.on_finish = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def check_cancelled(self):
+        """ 작업 스레드에서 호출합니다. 취소 요청이 있으면 JobCancelled를 발생시킵니다. """
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def report_progress(self, done, total):
+        """ 작업 스레드에서 호출합니다. UI 갱신이 과하지 않도록 일정 간격으로만 전달합니다. """
+        now = time.monotonic()
+        if done < total and now - self.last_progress < self.PROGRESS_INTERVAL:
+            return
+        self.last_progress = now
+        self.worker.results.put(("progress", self, (done, total)))
+
+class IOWorker:
+    """ 저장, 가져오기, 내보내기 같은 파일 작업을 Tk 메인 루프 밖의 스레드에서 순서대로 실행합니다.
+
+    결과와 오류는 결과 큐에 쌓이고, root.after로 주기적으로 꺼내 UI 스레드에서 콜백을 호출합니다.
+    같은 key로 제출된 작업은 가장 최근 것만 실행되므로, 밀린 저장 작업은 새 스냅샷이 대체합니다.
+    """
+    POLL_MS = 50
+
+    def __init__(self, root):
+        self.root = root
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.latest_seq = {}
+        self.seq = 0
+        self.outstanding = 0
+        self.poll_after_id = None
+        self.thread = threading.Thread(target=self.run, name="IOWorker", daemon=True)
+        self.thread.start()
+
+    def submit(self, func, on_done=None, on_error=None, key=None):
+        """ func(job)을 작업 스레드에서 실행하도록 예약하고 IOJob을 돌려줍니다. """
+        self.seq += 1
+        job = IOJob(self, func, self.seq, key)
+        job.on_done = on_done
+        job.on_error = on_error
+        if key is not None:
+            self.latest_seq[key] = job.seq
+        self.outstanding += 1
+        self.jobs.put(job)
+        self.schedule_poll()
+        return job
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            if job.key is not None and self.latest_seq.get(job.key) != job.seq:
+                self.results.put(("skipped", job, None))
+                continue
+            try:
+                job.check_cancelled()
+                result = job.func(job)
+            except JobCancelled:
+                self.results.put(("cancelled", job, None))
+            except Exception as e:
+                self.results.put(("error", job, e))
+            else:
+                self.results.put(("done", job, result))
+
+    def schedule_poll(self):
+        if self.poll_after_id is None:
+            self.poll_after_id = self.root.after(self.POLL_MS, self.poll)
+
+    def poll(self):
+        self.poll_after_id = None
+        self.dispatch_results()
+        if self.outstanding > 0:
+            self.schedule_poll()
+
+    def dispatch_results(self):
+        while True:
+            try:
+                kind, job, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                if job.on_progress:
+                    job.on_progress(*value)
+                continue
+            self.outstanding -= 1
+            if job.on_finish:
+                job.on_finish()
+            if kind == "done" and job.on_done:
+                job.on_done(value)
+            elif kind == "error" and job.on_error:
+                job.on_error(value)
+
+    def close(self):
+        """ 남은 작업을 모두 끝낸 뒤 작업 스레드를 종료합니다. """
+        if self.poll_after_id is not None:
+            self.root.after_cancel(self.poll_after_id)
+            self.poll_after_id = None
+        self.jobs.put(None)
+        self.thread.join()
+        self.dispatch_results()
+
+class ExternalChangeError(Exception):
+    """ 저장하려는 파일을 다른 프로그램이 먼저 바꿨을 때 발생합니다. 덮어쓰지 않고 먼저 합쳐야 합니다. """
+
+def process_alive(pid):
+    """ 이 컴퓨터에서 pid 프로세스가 아직 실행 중인지 봅니다. 알 수 없으면 실행 중으로 봅니다. """
+    if os.name == "nt":
+        # Windows의 os.kill(pid, 0)은 프로세스를 끝내므로 상태만 묻습니다.
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return kernel32.GetLastError() == 5  # 권한이 없으면 다른 사용자의 살아 있는 프로세스입니다.
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+class NotebookLock:
+    """ 여러 메모장이 같은 메모 파일을 함께 쓸 때, 읽고 쓰는 동안 다른 쪽을 기다리게 하는 권고 잠금 파일
+
+    O_EXCL로 잠금 파일을 만들 수 있으면 잠금을 얻은 것이고 끝나면 지웁니다. 잠금 파일에는 주인의 pid와
+    컴퓨터 이름을 적고, 잡고 있는 동안에는 TOUCH_SECONDS마다 수정 시간을 새로 고칩니다.
+    같은 컴퓨터에서 주인 프로세스가 끝났으면 바로, 그 밖에는 STALE_SECONDS 동안 새로 고쳐지지 않았으면 치웁니다.
+    """
+    STALE_SECONDS = 30
+    TOUCH_SECONDS = 5
+    RETRY_SECONDS = 0.05
+
+    def __init__(self, path, timeout=10):
+        self.path = path
+        self.timeout = timeout
+        self.held = None
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except (FileExistsError, PermissionError):
+                # Windows에서는 지우는 중인 파일을 만들려고 하면 PermissionError가 납니다.
+                self.remove_stale()
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"다른 메모장이 메모 파일을 쓰고 있습니다. ({self.path})")
+                time.sleep(self.RETRY_SECONDS)
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(f"{os.getpid()} {self.host_name()}\n")
+            # 오래 걸리는 쓰기 중에 다른 메모장이 오래된 잠금으로 여겨 치우지 않도록 수정 시간을 새로 고칩니다.
+            self.held = threading.Event()
+            threading.Thread(target=self.keep_fresh, args=(self.held,), daemon=True).start()
+            return self
+
+    def __exit__(self, *exc_info):
+        self.held.set()
+        self.held = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def keep_fresh(self, released):
+        while not released.wait(self.TOUCH_SECONDS):
+            try:
+                os.utime(self.path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def host_name():
+        # 잠금 파일을 만들 때만 필요하므로 여기서 불러옵니다.
+        import socket
+        return socket.gethostname()
+
+    def remove_stale(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                owner = f.read().split()
+            if len(owner) == 2 and owner[1] == self.host_name() and not process_alive(int(owner[0])):
+                os.remove(self.path)
+            elif time.time() - os.path.getmtime(self.path) > self.STALE_SECONDS:
+                os.remove(self.path)
+        except (OSError, ValueError):
+            pass
+
+class FileWatch:
+    """ 저장 파일들이 이 프로그램 밖에서 바뀌었는지 확인합니다.
+
+    평소에는 수정 시간과 크기만 비교하고, 달라졌을 때만 내용 해시를 구해 정말 바뀌었는지 봅니다.
+    동기화 프로그램이 같은 내용으로 파일만 다시 쓴 경우는 바뀐 것으로 보지 않습니다.
+    이 프로그램이 직접 쓴 뒤에는 파일을 다시 읽지 않고 stat만 기억하므로(note_written), 그 뒤 stat이
+    달라지면 비교할 해시가 없어 바뀐 것으로 봅니다.
+    """
+    # note_written으로 stat만 기억한 파일의 해시 자리. 실제 해시나 None(파일 없음)과 같을 수 없습니다.
+    UNHASHED = b""
+
+    def __init__(self, paths):
+        self.paths = paths
+        # 경로별 ((mtime_ns, 크기), 해시). 파일이 없으면 (None, None)입니다. 통째로 바꿔 넣어 스레드 간에 주고받습니다.
+        self.known = {}
+
+    @staticmethod
+    def stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def file_hash(path):
+        h = hashlib.blake2b(digest_size=16)
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(EXPORT_BUFFER_SIZE), b""):
+                    h.update(chunk)
+        except OSError:
+            return None
+        return h.digest()
+
+    def stat_changed(self):
+        """ UI 스레드에서 주기적으로 부릅니다. 수정 시간이나 크기가 기억한 것과 다르면 True """
+        known = self.known
+        return any(self.stat(path) != known.get(path, (None, None))[0] for path in self.paths)
+
+    def scan(self):
+        """ stat이 달라진 파일만 해시를 다시 구합니다. 돌려주는 값: (새 상태, 내용이 바뀌었는지) """
+        known = self.known
+        state = {}
+        changed = False
+        for path in self.paths:
+            old = known.get(path, (None, None))
+            st = self.stat(path)
+            if st == old[0]:
+                state[path] = old
+                continue
+            digest = self.file_hash(path) if st is not None else None
+            state[path] = (st, digest)
+            if digest != old[1]:
+                changed = True
+        return state, changed
+
+    def note_written(self):
+        """ 이 프로그램이 방금 쓴 파일의 stat만 기억합니다. 저장할 때마다 파일 전체를 해시하지 않기 위함입니다. """
+        known = dict(self.known)
+        for path in self.paths:
+            st = self.stat(path)
+            if st != known.get(path, (None, None))[0]:
+                known[path] = (st, self.UNHASHED if st is not None else None)
+        self.known = known
+
+def align_digests(a, b):
+    """ 두 해시 목록을 맞춰 difflib의 get_opcodes()와 같은 (태그, i1, i2, j1, j2) 목록을 돌려줍니다.
+
+    양쪽에 한 번씩만 나오는 해시 중 순서가 맞는 가장 긴 것들을 기준점으로 잡고(patience diff),
+    기준점 사이는 앞뒤의 같은 부분만 잘라 냅니다. 메모가 수십만 개여도 목록 길이에 거의 비례하는 시간이 듭니다.
+    """
+    counts = {}
+    for digest in a:
+        counts[digest] = counts.get(digest, 0) + 1
+    b_positions = {}
+    for j, digest in enumerate(b):
+        b_positions[digest] = -1 if digest in b_positions else j
+    pairs = [(i, b_positions[digest]) for i, digest in enumerate(a)
+             if counts[digest] == 1 and b_positions.get(digest, -1) >= 0]
+    # b 쪽 위치가 증가하는 가장 긴 부분 수열 (이분 탐색)
+    tails = []
+    tail_pairs = []
+    previous = [None] * len(pairs)
+    for k, (i, j) in enumerate(pairs):
+        t = bisect.bisect_left(tails, j)
+        if t == len(tails):
+            tails.append(j)
+            tail_pairs.append(k)
+        else:
+            tails[t] = j
+            tail_pairs[t] = k
+        previous[k] = tail_pairs[t - 1] if t > 0 else None
+    anchors = []
+    k = tail_pairs[-1] if tail_pairs else None
+    while k is not None:
+        anchors.append(pairs[k])
+        k = previous[k]
+    anchors.reverse()
+    anchors.append((len(a), len(b)))
+
+    opcodes = []
+    def add(tag, i1, i2, j1, j2):
+        if i1 == i2 and j1 == j2: return
+        if tag == "equal" and opcodes and opcodes[-1][0] == "equal":
+            opcodes[-1] = ("equal", opcodes[-1][1], i2, opcodes[-1][3], j2)
+        else:
+            opcodes.append((tag, i1, i2, j1, j2))
+    i = j = 0
+    for ai, aj in anchors:
+        start_i, start_j = i, j
+        while i < ai and j < aj and a[i] == b[j]:
+            i += 1
+            j += 1
+        add("equal", start_i, i, start_j, j)
+        end_i, end_j = ai, aj
+        while end_i > i and end_j > j and a[end_i - 1] == b[end_j - 1]:
+            end_i -= 1
+            end_j -= 1
+        if end_i > i and end_j > j:
+            add("replace", i, end_i, j, end_j)
+        elif end_i > i:
+            add("delete", i, end_i, j, j)
+        elif end_j > j:
+            add("insert", i, i, j, end_j)
+        add("equal", end_i, ai, end_j, aj)
+        if ai < len(a):
+            add("equal", ai, ai + 1, aj, aj + 1)
+        i, j = ai + 1, aj + 1
+    return opcodes
+
+def merge_external_change(base, base_digests, memos, theirs, theirs_digests, keep=None):
+    """ 마지막으로 맞춘 파일 상태 base에서 다른 프로그램이 theirs로 바꾼 내용을 memos에 합칩니다.
+
+    base는 (메모 객체 또는 None, 제목, 내용) 목록이며, 그 뒤 이 프로그램에서 고친 메모는 객체의 제목이나 내용이 다릅니다.
+    base_digests와 theirs_digests는 양쪽 메모의 memo_digest 목록입니다.
+    이쪽에서 손대지 않은 메모만 제자리에서 고치거나 지우고, 양쪽에서 모두 고친 메모는 이쪽 것을 그대로 두고
+    저쪽 것을 제목에 표시를 붙여 바로 뒤에 추가합니다. keep(열려 있는 메모)은 저쪽에서 지웠어도 남깁니다.
+    저쪽에서 새로 생긴 메모는 앞 메모 뒤에 넣습니다.
+    돌려주는 값: (합친 목록, theirs에 맞춘 새 base, 제자리에서 고친 메모 목록, 충돌 수)
+    """
+    present = {memo.id for memo in memos}
+
+    def alive(entry):
+        return entry[0] is not None and entry[0].id in present
+
+    def untouched(entry):
+        memo, title, content = entry
+        return alive(entry) and memo.title == title and memo.content == content
+
+    new_base = []
+    updated = []
+    removed = set()
+    # 앞 메모의 id(맨 앞이면 None) -> 그 뒤에 넣을 메모 목록
+    inserts = {}
+    conflicts = 0
+    anchor = None
+
+    def insert_after(memo, new_memo):
+        inserts.setdefault(memo.id if memo is not None else None, []).append(new_memo)
+
+    for tag, i1, i2, j1, j2 in align_digests(base_digests, theirs_digests):
+        if tag == "equal":
+            for i in range(i1, i2):
+                new_base.append(base[i])
+                if alive(base[i]):
+                    anchor = base[i][0]
+            continue
+        pairs = min(i2 - i1, j2 - j1)
+        for k in range(pairs):
+            entry, memo = base[i1 + k], theirs[j1 + k]
+            if untouched(entry):
+                entry[0].title, entry[0].content = memo.title, memo.content
+                updated.append(entry[0])
+                new_base.append((entry[0], memo.title, memo.content))
+                anchor = entry[0]
+            elif alive(entry) and entry[0].title == memo.title and entry[0].content == memo.content:
+                # 양쪽이 같은 내용으로 고쳤으면(이쪽 편집이 저장 도중에 함께 쓰인 경우 등) 충돌이 아닙니다.
+                new_base.append((entry[0], memo.title, memo.content))
+                anchor = entry[0]
+            elif alive(entry):
+                # 양쪽에서 고친 메모: 이쪽 것을 두고 저쪽 것을 따로 남깁니다.
+                anchor = entry[0]
+                title = memo.title
+                memo.title = f"{title} (다른 곳에서 바뀜)"
+                memo.uid = None
+                insert_after(anchor, memo)
+                new_base.append((memo, title, memo.content))
+                conflicts += 1
+            else:
+                # 이쪽에서 지운 메모를 저쪽에서 고쳤으면 고친 내용을 살립니다.
+                insert_after(anchor, memo)
+                new_base.append((memo, memo.title, memo.content))
+        for entry in base[i1 + pairs:i2]:
+            if untouched(entry) and entry[0] is not keep:
+                removed.add(entry[0].id)
+        for memo in theirs[j1 + pairs:j2]:
+            insert_after(anchor, memo)
+            new_base.append((memo, memo.title, memo.content))
+
+    merged = list(inserts.get(None, ()))
+    for memo in memos:
+        if memo.id not in removed:
+            merged.append(memo)
+        merged.extend(inserts.get(memo.id, ()))
+    return merged, new_base, updated, conflicts
+
+class JsonMemoStore:
+    """ memos.json 하나에 메모 전체를 읽고 쓰는 기본 저장소
+
+    record_* 메서드는 UI 스레드에서 변경 내용을 알리는 용도이며, 이 저장소는 매번 전체를
+    다시 쓰므로 아무것도 기록하지 않습니다. prepare_save는 UI 스레드에서, write는 작업 스레드에서 호출됩니다.
+    """
+    # 전체 스냅샷만 쓰므로 밀린 저장 작업은 최신 것 하나만 실행하면 됩니다.
+    supersedes = True
+    # 메모 내용을 처음부터 모두 메모리에 올려 둡니다.
+    lazy_content = False
+
+    def __init__(self, file_path, compression="none", compression_level=6):
+        self.file_path = file_path
+        # 스냅샷을 쓸 때의 압축 형식과 수준. 읽을 때는 파일을 보고 알아냅니다.
+        self.compression = compression
+        self.compression_level = compression_level
+        self.journal_path = file_path + ".journal"
+        self.old_journal_path = self.journal_path + ".old"
+        self.temp_path = file_path + ".tmp"
+        # 성능 통계용: 지금까지 파일에 쓴 바이트 수
+        self.bytes_written = 0
+
+    def load(self):
+        memos = self.read_snapshot()
+        if os.path.exists(self.journal_path) or os.path.exists(self.old_journal_path):
+            # 저널 형식을 쓰다가 기본 형식으로 돌아온 경우: 남은 변경 기록을 반영하고 한 번 정리합니다.
+            memos = self.recover_journal(memos)
+            self.write_snapshot(memos)
+            for path in (self.journal_path, self.old_journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        return memos
+
+    def read_snapshot(self):
+        if not os.path.exists(self.file_path): return []
+        try:
+            return self.parse_snapshot()
+        except (ValueError, IOError, KeyError, TypeError):
+             return []
+
+    def parse_snapshot(self):
+        """ 스냅샷 파일을 읽습니다. read_snapshot과 달리 파일이 없거나 깨졌으면 예외를 그대로 발생시킵니다. """
+        with open(self.file_path, "rb") as f:
+            data = decompress_snapshot(f.read())
+        return [Memo.from_dict(data) for data in json.loads(data)]
+
+    def watch_paths(self):
+        """ 다른 프로그램이 바꿨는지 지켜볼 파일 목록 """
+        return [self.file_path]
+
+    def read_current(self):
+        """ 다른 프로그램이 바꾼 파일을 다시 읽습니다. load와 달리 파일을 고치지 않습니다. """
+        memos = self.parse_snapshot()
+        if os.path.exists(self.old_journal_path) and os.path.exists(self.temp_path):
+            self.replay_journal(self.old_journal_path, memos, truncate=False)
+        self.replay_journal(self.journal_path, memos, truncate=False)
+        return memos
+
+    def write_snapshot(self, memos):
+        """ 임시 파일에 쓴 뒤 교체하여, 쓰는 도중 종료되어도 기존 파일이 남게 합니다. """
+        self.write_temp_snapshot(memos)
+        os.replace(self.temp_path, self.file_path)
+        self.bytes_written += os.path.getsize(self.file_path)
+
+    def write_temp_snapshot(self, memos):
+        """ 공백 없는 JSON으로 임시 파일에 스냅샷을 씁니다. 설정에 따라 압축합니다. """
+        with open_snapshot_writer(self.temp_path, self.compression, self.compression_level) as f:
+            write_json_array(f, (memo.to_dict() for memo in memos), compact=True)
+
+    def recover_journal(self, memos):
+        """ 스냅샷에 아직 반영되지 않은 변경 기록을 순서대로 적용합니다. """
+        # .old가 남아 있고 임시 파일도 남아 있다면 압축 도중 스냅샷 교체 전에 멈춘 것이므로 .old도 적용합니다.
+        if os.path.exists(self.old_journal_path) and os.path.exists(self.temp_path):
+            self.replay_journal(self.old_journal_path, memos)
+        self.replay_journal(self.journal_path, memos)
+        return memos
+
+    @staticmethod
+    def replay_journal(path, memos, truncate=True):
+        """ 저널 파일의 기록을 memos에 적용합니다. 쓰다 만 마지막 줄은 (truncate이면) 잘라냅니다. 적용한 바이트 수를 돌려줍니다. """
+        if not os.path.exists(path): return 0
+        valid_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    JsonMemoStore.apply_record(memos, json.loads(line.decode("utf-8")))
+                except (ValueError, KeyError, IndexError, TypeError):
+                    break
+                valid_bytes += len(line)
+        if truncate and valid_bytes < os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(valid_bytes)
+        return valid_bytes
+
+    @staticmethod
+    def apply_record(memos, record):
+        op = record["op"]
+        if op == "update":
+            memos[record["index"]] = Memo.from_dict(record)
+        elif op == "insert":
+            memos.insert(record["index"], Memo.from_dict(record))
+        elif op == "delete":
+            del memos[record["index"]]
+        elif op == "move":
+            if "indices" in record:
+                move_block(memos, record["indices"], record["to"])
+            else:
+                memos.insert(record["to"], memos.pop(record["from"]))
+        else:
+            raise ValueError(f"알 수 없는 기록: {op}")
+
+    def record_update(self, index, memo): pass
+    def record_insert(self, index, memo): pass
+    def record_insert_block(self, index, memos): pass
+    def record_delete(self, index): pass
+    def record_move(self, indices, target): pass
+    def record_replace(self): pass
+
+    def export_view(self, memos, indices=None):
+        """ 내보내기 작업이 작업 스레드에서 순회할 메모들을 돌려줍니다. indices가 있으면 그 메모만 돌려줍니다.
+
+        메모 객체는 복사하지 않고 참조만 모읍니다.
+        """
+        if indices is None:
+            return list(memos)
+        return [memos[i] for i in indices]
+
+    def iter_contents(self, memos, indices=None):
+        """ 메모 목록 순서대로 내용을 돌려줍니다. indices가 있으면 그 위치의 메모만 차례로 돌려줍니다. """
+        if indices is None:
+            return (memo.content for memo in memos)
+        return (memos[i].content for i in indices)
+
+    def prepare_save(self, memos):
+        # 얕은 복사로 고정되는 것은 메모의 순서뿐입니다. 메모 객체는 제자리에서 고쳐지므로 쓰는 도중의 편집이
+        # 함께 쓰일 수 있지만, 그 편집은 변경 상태로 남아 다음 저장 때 다시 씁니다.
+        return list(memos)
+
+    def write(self, snapshot):
+        self.write_snapshot(snapshot)
+
+    def close(self): pass
+
+class JournalMemoStore(JsonMemoStore):
+    """ 스냅샷(memos.json)과 변경 기록(memos.json.journal)을 함께 쓰는 저장소
+
+    수정, 추가, 삭제, 이동은 한 줄짜리 기록으로 저널 끝에 덧붙이므로 저장 비용이 노트 전체가 아닌
+    변경 크기에 비례합니다. 저널이 compact_bytes를 넘으면 다음 저장 때 스냅샷을 새로 쓰고 저널을 비웁니다.
+    """
+    # 저장 작업마다 서로 다른 기록 묶음을 가지므로 건너뛰면 안 됩니다.
+    supersedes = False
+
+    def __init__(self, file_path, compact_bytes, compression="none", compression_level=6):
+        super().__init__(file_path, compression, compression_level)
+        self.compact_bytes = compact_bytes
+        self.pending = []
+        self.snapshot_required = False
+        self.journal_bytes = 0
+        # 쓰지 못한 (기록, 스냅샷). 작업 스레드만 다루며, 다음 write가 새 내용보다 먼저 다시 씁니다.
+        self.unwritten = None
+
+    def load(self):
+        memos = self.read_snapshot()
+        if os.path.exists(self.old_journal_path):
+            # 압축 도중 멈춘 경우: 복구한 내용으로 스냅샷을 다시 쓰도록 합니다.
+            memos = self.recover_journal(memos)
+            self.snapshot_required = True
+        else:
+            self.journal_bytes = self.replay_journal(self.journal_path, memos)
+        return memos
+
+    def watch_paths(self):
+        return [self.file_path, self.journal_path]
+
+    def read_current(self):
+        memos = super().read_current()
+        # 다른 프로그램이 덧붙인 기록까지 저널 크기에 넣어야 제때 압축합니다.
+        self.journal_bytes = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        return memos
+
+    def add_record(self, record):
+        # 같은 메모를 연달아 고친 기록은 마지막 것만 남깁니다.
+        if (record["op"] == "update" and self.pending and self.pending[-1]["op"] == "update"
+                and self.pending[-1]["index"] == record["index"]):
+            self.pending[-1] = record
+        else:
+            self.pending.append(record)
+
+    def record_update(self, index, memo):
+        self.add_record({"op": "update", "index": index, **memo.to_dict()})
+
+    def record_insert(self, index, memo):
+        self.add_record({"op": "insert", "index": index, **memo.to_dict()})
+
+    def record_insert_block(self, index, memos):
+        for offset, memo in enumerate(memos):
+            self.record_insert(index + offset, memo)
+
+    def record_delete(self, index):
+        self.add_record({"op": "delete", "index": index})
+
+    def record_move(self, indices, target):
+        last = self.pending[-1] if self.pending else None
+        # 한 메모를 연달아 옮긴 기록은 처음 자리에서 마지막 자리로 한 번 옮긴 기록으로 합칩니다.
+        if (len(indices) == 1 and last is not None and last["op"] == "move" and len(last.get("indices", ())) == 1
+                and indices[0] == block_start(last["indices"], last["to"])):
+            origin = last["indices"][0]
+            start = block_start(indices, target)
+            if start == origin:
+                self.pending.pop()
+            else:
+                last["to"] = start if start < origin else start + 1
+            return
+        self.add_record({"op": "move", "indices": list(indices), "to": target})
+
+    def record_replace(self):
+        self.snapshot_required = True
+
+    def prepare_save(self, memos):
+        records, self.pending = self.pending, []
+        if self.snapshot_required or self.journal_bytes >= self.compact_bytes:
+            # 스냅샷이 지금까지의 기록을 모두 포함하므로 기록은 버립니다.
+            self.snapshot_required = False
+            self.journal_bytes = 0
+            return (None, list(memos))
+        return (records, None)
+
+    def write(self, payload):
+        """ 스냅샷이 있으면 압축하고, 기록은 저널 끝에 덧붙입니다.
+
+        쓰지 못한 내용은 남겨 두었다가 다음 write에서 먼저 씁니다. 새 스냅샷은 앞선 기록을 모두 포함하므로
+        그때는 남은 기록을 버리고, 앞선 스냅샷이 실패했으면 그 스냅샷을 쓴 뒤 새 기록을 덧붙입니다.
+        실패한 스냅샷의 메모 객체는 그 뒤에 고쳐졌을 수 있지만, 뒤따르는 수정 기록이 내용 전체를 담으므로 결과는 같습니다.
+        """
+        records, snapshot = payload
+        records = records or []
+        if self.unwritten is not None and snapshot is None:
+            old_records, snapshot = self.unwritten
+            records = old_records + records
+        try:
+            if snapshot is not None:
+                self.compact(snapshot)
+            self.append_records(records)
+        except Exception:
+            self.unwritten = (records, snapshot)
+            raise
+        self.unwritten = None
+
+    def append_records(self, records):
+        if not records: return
+        data = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records).encode("utf-8")
+        size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        try:
+            with open(self.journal_path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError:
+            # 일부만 쓰였으면 잘라 내야 다시 쓸 때 같은 기록이 두 번 적용되지 않습니다.
+            try:
+                os.truncate(self.journal_path, size)
+            except OSError:
+                pass
+            raise
+        self.journal_bytes += len(data)
+        self.bytes_written += len(data)
+
+    def compact(self, snapshot):
+        """ 새 스냅샷을 원자적으로 쓰고 저널을 비웁니다.
+
+        순서: 임시 파일 작성 → 저널을 .old로 이름 변경 → 스냅샷 교체 → .old 삭제.
+        어느 단계에서 멈춰도 load가 임시 파일과 .old의 존재로 상태를 판별해 복구할 수 있습니다.
+        """
+        self.write_temp_snapshot(snapshot)
+        if os.path.exists(self.journal_path):
+            os.replace(self.journal_path, self.old_journal_path)
+        os.replace(self.temp_path, self.file_path)
+        self.bytes_written += os.path.getsize(self.file_path)
+        if os.path.exists(self.old_journal_path):
+            os.remove(self.old_journal_path)
+
+class SqliteMemoStore:
+    """ 메모 한 개를 한 행으로 저장하는 SQLite 저장소 (memos.db)
+
+    시작할 때는 제목과 순서만 읽고, 내용은 load_content로 메모를 열 때 가져옵니다.
+    UI 스레드의 record_* 호출은 행 id 목록(ids)을 메모 목록과 같은 순서로 유지하며 변경을 쌓아 두고,
+    작업 스레드의 write가 이를 한 트랜잭션으로 반영합니다.
+    position 열은 정렬 키이며 이웃 사이에 틈을 두고 매기므로(ranks), 추가·삭제·이동은 해당 행만 고칩니다.
+    두 이웃 사이에 틈이 남지 않으면 그때 한 번 전체를 RANK_GAP 간격으로 다시 매깁니다.
+    """
+    supersedes = False
+    lazy_content = True
+    RANK_GAP = 1 << 20
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.db_path = os.path.splitext(file_path)[0] + ".db"
+        self.ids = []
+        self.ranks = []
+        self.next_id = 1
+        self.pending = []
+        self.replace_required = False
+        # 커밋하지 못한 기록. 작업 스레드만 다루며, 다음 write가 새 기록보다 먼저 다시 씁니다.
+        self.failed_records = []
+        # 아직 DB에 반영되지 않은 내용. 작업 스레드가 커밋한 뒤 지웁니다.
+        self.unsaved_content = {}
+        self.lock = threading.Lock()
+        self.conn = None
+        # 성능 통계용: 지금까지 DB에 쓴 제목과 내용의 바이트 수
+        self.bytes_written = 0
+
+    def load(self):
+        # sqlite 형식을 쓸 때만 필요하므로 여기서 불러옵니다.
+        import sqlite3
+        is_new = not os.path.exists(self.db_path)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS memos ("
+                "id INTEGER PRIMARY KEY, position INTEGER NOT NULL, "
+                "title TEXT NOT NULL, content TEXT NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS memos_position ON memos(position)")
+            # 수정 기록을 찾는 uid 열은 나중에 생겼으므로 예전 DB에는 덧붙입니다.
+            if "uid" not in {row[1] for row in self.conn.execute("PRAGMA table_info(memos)")}:
+                self.conn.execute("ALTER TABLE memos ADD COLUMN uid TEXT")
+        if is_new:
+            self.migrate_json()
+
+        memos = []
+        with self.lock:
+            for memo_id, title, uid, rank in self.conn.execute("SELECT id, title, uid, position FROM memos ORDER BY position"):
+                self.ids.append(memo_id)
+                self.ranks.append(rank)
+                memos.append(Memo(title, None, uid=uid))
+        self.next_id = max(self.ids, default=0) + 1
+        return memos
+
+    def migrate_json(self):
+        """ 처음 DB를 만들 때 기존 memos.json(과 남은 저널)을 한 번 옮기고 원본은 .bak으로 남깁니다. """
+        if not os.path.exists(self.file_path): return
+        memos = JsonMemoStore(self.file_path).load()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO memos (id, position, title, content, uid) VALUES (?, ?, ?, ?, ?)",
+                ((i + 1, (i + 1) * self.RANK_GAP, m.title, m.content, m.uid) for i, m in enumerate(memos))
+            )
+        os.replace(self.file_path, self.file_path + ".bak")
+
+    def watch_paths(self):
+        # 행 단위로 쓰는 DB는 SQLite가 직접 잠금을 관리하므로 파일 변경은 지켜보지 않습니다.
+        return []
+
+    def load_content(self, index):
+        memo_id = self.ids[index]
+        with self.lock:
+            if memo_id in self.unsaved_content:
+                return self.unsaved_content[memo_id]
+            row = self.conn.execute("SELECT content FROM memos WHERE id = ?", (memo_id,)).fetchone()
+        return row[0] if row else ""
+
+    def export_view(self, memos, indices=None):
+        # 호출 전에 저장을 먼저 제출하므로, 작업 스레드에서 순회할 때는 DB가 최신 상태입니다.
+        if indices is None:
+            return self.iter_memos()
+        return self.iter_memos_by_id([self.ids[i] for i in indices])
+
+    def iter_contents(self, memos, indices=None, batch_size=500):
+        """ 메모 목록 순서대로 내용을 돌려줍니다. 여러 행을 한 번에 읽고, 저장 전인 내용을 우선합니다.
+
+        indices가 있으면 그 위치의 메모만 차례로 돌려줍니다.
+        """
+        if indices is None:
+            indices = range(len(self.ids))
+        for start in range(0, len(indices), batch_size):
+            chunk_indices = indices[start:start + batch_size]
+            # 이미 메모리에 있는 내용은 다시 읽지 않습니다.
+            chunk = [self.ids[i] for i in chunk_indices if memos[i].content is None]
+            rows, unsaved = {}, {}
+            if chunk:
+                placeholders = ",".join("?" * len(chunk))
+                with self.lock:
+                    rows = dict(self.conn.execute(f"SELECT id, content FROM memos WHERE id IN ({placeholders})", chunk))
+                    unsaved = {memo_id: self.unsaved_content[memo_id] for memo_id in chunk if memo_id in self.unsaved_content}
+            for index in chunk_indices:
+                content = memos[index].content
+                if content is None:
+                    memo_id = self.ids[index]
+                    content = unsaved.get(memo_id, rows.get(memo_id, ""))
+                yield content
+
+    def iter_memos(self, batch_size=500):
+        """ 순서대로 메모를 읽습니다. 한 번에 batch_size 행만 메모리에 올리고, 다음 묶음은 마지막 정렬 키 뒤부터 읽습니다. """
+        last_rank = float("-inf")
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT title, content, uid, position FROM memos WHERE position > ? ORDER BY position LIMIT ?",
+                    (last_rank, batch_size)
+                ).fetchall()
+            for title, content, uid, _ in rows:
+                yield Memo(title, content, uid=uid)
+            if len(rows) < batch_size: break
+            last_rank = rows[-1][3]
+
+    def iter_memos_by_id(self, memo_ids, batch_size=500):
+        """ memo_ids 순서대로 메모를 읽습니다. """
+        for start in range(0, len(memo_ids), batch_size):
+            chunk = memo_ids[start:start + batch_size]
+            placeholders = ",".join("?" * len(chunk))
+            with self.lock:
+                rows = {row[0]: row[1:] for row in self.conn.execute(
+                    f"SELECT id, title, content, uid FROM memos WHERE id IN ({placeholders})", chunk
+                )}
+            for memo_id in chunk:
+                if memo_id in rows:
+                    title, content, uid = rows[memo_id]
+                    yield Memo(title, content, uid=uid)
+
+    def add_record(self, record):
+        # 같은 메모를 연달아 고친 기록은 마지막 것만 남깁니다.
+        # 한 메모를 연달아 옮긴 기록도 마지막 정렬 키만 남깁니다.
+        if (record[0] in ("update", "move") and self.pending and self.pending[-1][0] == record[0]
+                and self.pending[-1][1] == record[1]):
+            self.pending[-1] = record
+        else:
+            self.pending.append(record)
+
+    def record_update(self, index, memo):
+        memo_id = self.ids[index]
+        with self.lock:
+            self.unsaved_content[memo_id] = memo.content
+        self.add_record(("update", memo_id, memo.title, memo.uid, memo.content))
+
+    def record_insert(self, index, memo):
+        memo_id = self.next_id
+        self.next_id += 1
+        ranks = self.free_ranks(index, index, 1)
+        if ranks is None:
+            self.rebalance()
+            ranks = self.free_ranks(index, index, 1)
+        self.ids.insert(index, memo_id)
+        self.ranks.insert(index, ranks[0])
+        with self.lock:
+            self.unsaved_content[memo_id] = memo.content
+        self.add_record(("insert", memo_id, ranks[0], memo.title, memo.uid, memo.content))
+
+    def record_insert_block(self, index, memos):
+        """ 메모 여러 개를 index 자리에 이어서 넣습니다. 정렬 키는 이웃 사이를 한 번에 고르게 나눠 매깁니다. """
+        ranks = self.free_ranks(index, index, len(memos))
+        if ranks is None:
+            self.rebalance()
+            ranks = self.free_ranks(index, index, len(memos))
+        memo_ids = list(range(self.next_id, self.next_id + len(memos)))
+        self.next_id += len(memos)
+        self.ids[index:index] = memo_ids
+        self.ranks[index:index] = ranks
+        with self.lock:
+            for memo_id, memo in zip(memo_ids, memos):
+                self.unsaved_content[memo_id] = memo.content
+        for memo_id, rank, memo in zip(memo_ids, ranks, memos):
+            self.add_record(("insert", memo_id, rank, memo.title, memo.uid, memo.content))
+
+    def record_delete(self, index):
+        self.ranks.pop(index)
+        self.add_record(("delete", self.ids.pop(index)))
+
+    def record_move(self, indices, target):
+        """ 옮긴 메모들에만 이웃 사이의 새 정렬 키를 매깁니다. 틈이 모자라면 전체를 다시 매깁니다. """
+        start = move_block(self.ids, indices, target)
+        move_block(self.ranks, indices, target)
+        count = len(indices)
+        ranks = self.free_ranks(start, start + count, count)
+        if ranks is None:
+            self.rebalance()
+            return
+        self.ranks[start:start + count] = ranks
+        for memo_id, rank in zip(self.ids[start:start + count], ranks):
+            self.add_record(("move", memo_id, rank))
+
+    def free_ranks(self, first, end, count):
+        """ first - 1번째 행과 end번째 행 사이에 고르게 들어갈 정렬 키 count개. 틈이 모자라면 None입니다. """
+        low = self.ranks[first - 1] if first > 0 else None
+        high = self.ranks[end] if end < len(self.ranks) else None
+        if low is None:
+            low = (0 if high is None else high) - (count + 1) * self.RANK_GAP
+        if high is None:
+            high = low + (count + 1) * self.RANK_GAP
+        step = (high - low) // (count + 1)
+        if step < 1:
+            return None
+        return [low + step * (i + 1) for i in range(count)]
+
+    def rebalance(self):
+        self.ranks = [(i + 1) * self.RANK_GAP for i in range(len(self.ids))]
+        self.add_record(("rebalance", list(self.ids)))
+
+    def record_replace(self):
+        self.replace_required = True
+
+    def prepare_save(self, memos):
+        if self.replace_required:
+            self.replace_required = False
+            self.pending = []
+            first_id = self.next_id
+            self.ids = list(range(first_id, first_id + len(memos)))
+            self.ranks = [(i + 1) * self.RANK_GAP for i in range(len(memos))]
+            self.next_id += len(memos)
+            # 행은 작업 스레드에서 얕은 복사본을 순회하며 만들어 한꺼번에 큰 목록을 만들지 않습니다.
+            return [("replace", first_id, list(memos))]
+        records, self.pending = self.pending, []
+        return records
+
+    def write(self, records):
+        """ 기록을 한 트랜잭션으로 반영합니다. 실패하면 되돌린 기록을 남겨 두었다가 다음 write에서 함께 씁니다. """
+        records = self.failed_records + records
+        if not records: return
+        with self.lock:
+            try:
+                with self.conn:
+                    for record in records:
+                        self.apply_record(record)
+            except Exception:
+                self.failed_records = records
+                raise
+            self.failed_records = []
+            for record in records:
+                if record[0] in ("update", "insert") and self.unsaved_content.get(record[1]) is record[-1]:
+                    del self.unsaved_content[record[1]]
+                elif record[0] == "replace":
+                    self.unsaved_content.clear()
+
+    def apply_record(self, record):
+        op = record[0]
+        execute = self.conn.execute
+        if op == "update":
+            _, memo_id, title, uid, content = record
+            execute("UPDATE memos SET title = ?, content = ?, uid = ? WHERE id = ?", (title, content, uid, memo_id))
+            self.bytes_written += self.text_bytes(title, content)
+        elif op == "insert":
+            _, memo_id, rank, title, uid, content = record
+            self.bytes_written += self.text_bytes(title, content)
+            execute(
+                "INSERT INTO memos (id, position, title, content, uid) VALUES (?, ?, ?, ?, ?)",
+                (memo_id, rank, title, content, uid)
+            )
+        elif op == "delete":
+            _, memo_id = record
+            execute("DELETE FROM memos WHERE id = ?", (memo_id,))
+        elif op == "move":
+            _, memo_id, rank = record
+            execute("UPDATE memos SET position = ? WHERE id = ?", (rank, memo_id))
+        elif op == "rebalance":
+            _, memo_ids = record
+            self.conn.executemany(
+                "UPDATE memos SET position = ? WHERE id = ?",
+                (((i + 1) * self.RANK_GAP, memo_id) for i, memo_id in enumerate(memo_ids))
+            )
+        elif op == "replace":
+            _, first_id, memos = record
+            execute("DELETE FROM memos")
+            def rows():
+                for i, m in enumerate(memos):
+                    self.bytes_written += self.text_bytes(m.title, m.content)
+                    yield (first_id + i, (i + 1) * self.RANK_GAP, m.title, m.content, m.uid)
+            self.conn.executemany("INSERT INTO memos (id, position, title, content, uid) VALUES (?, ?, ?, ?, ?)", rows())
+
+    @staticmethod
+    def text_bytes(title, content):
+        return len(title.encode("utf-8")) + len(content.encode("utf-8"))
+
+    def close(self):
+        if self.conn is not None:
+            with self.lock:
+                self.conn.close()
+            self.conn = None
+
+class VirtualListbox(tk.Frame):
+    """ 보이는 행(과 약간의 여유 행)만 그리는 가상 메모 목록
+
+    안쪽 Listbox에는 화면에 들어가는 만큼의 행만 넣고, 행 내용은 get_title(index)와 get_count()로
+    모델에서 바로 읽습니다. 스크롤바 위치는 모델 인덱스로 환산하며, 선택과 활성 행도 모델 인덱스로 관리합니다.
+    앱에서 쓰는 Listbox 메서드(curselection, selection_set, activate, see, bind 등)는 같은 이름으로 제공하므로
+    메모 수와 관계없이 그리기와 스크롤 비용이 일정합니다.
+    Shift/Ctrl 클릭으로 여러 행을 고를 수 있고, 고른 행을 끌어 놓으면 놓을 자리(drop_index)와 함께
+    <<ListboxDrop>> 가상 이벤트를 발생시킵니다. 실제 이동은 앱이 합니다.
+    """
+    OVERSCAN = 2
+    # 끄는 중 마우스가 목록 밖에 있을 때 한 줄씩 스크롤하는 간격
+    AUTOSCAN_MS = 50
+
+    def __init__(self, master, get_title, get_count, **listbox_options):
+        super().__init__(master)
+        self.get_title = get_title
+        self.get_count = get_count
+        self.top = 0
+        self.selected = set()
+        self.active_index = -1
+        self.rendered_first = 0
+        self.rendered_count = 0
+        self.render_after_id = None
+        # 확장 선택의 기준 행과 끌어 옮기기 상태. drop_index는 옮기기 전 기준으로 놓을 자리입니다.
+        self.anchor_index = -1
+        self.press_index = None
+        self.dragging = False
+        self.drop_index = None
+        self.drag_y = 0
+        self.autoscan_after_id = None
+
+        self.inner = tk.Listbox(self, exportselection=False, **listbox_options)
+        self.inner.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # 행 높이는 글꼴로 어림잡았다가, 두 행 이상 그려지면 실제 간격으로 바꿉니다.
+        self.row_height = font.Font(font=self.inner.cget("font")).metrics("linespace") + 3
+        self.row_height_measured = False
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # 끄는 동안 놓을 자리를 보여 주는 가로줄
+        self.drop_line = tk.Frame(self, height=2, bg="#3070ff")
+
+        # 기본 Listbox 동작은 그려진 행 안에서만 움직이므로 선택과 스크롤은 직접 처리합니다.
+        self.inner.bind("<Configure>", lambda event: self.schedule_render())
+        self.inner.bind("<Button-1>", self.on_click)
+        self.inner.bind("<Shift-Button-1>", self.on_shift_click)
+        self.inner.bind("<Control-Button-1>", self.on_control_click)
+        self.inner.bind("<B1-Motion>", self.on_drag)
+        self.inner.bind("<ButtonRelease-1>", self.on_release)
+        # 클래스 바인딩의 tk::ListboxAutoScan은 그려진 행 안에서만 스크롤하고, 놓을 때 멈추는 처리도 위에서 막히므로 쓰지 않습니다.
+        self.inner.bind("<B1-Leave>", lambda event: "break")
+        self.inner.bind("<B1-Enter>", lambda event: "break")
+        self.inner.bind("<Up>", lambda event: self.on_arrow_key(-1))
+        self.inner.bind("<Down>", lambda event: self.on_arrow_key(1))
+        self.inner.bind("<Shift-Up>", lambda event: self.on_shift_arrow_key(-1))
+        self.inner.bind("<Shift-Down>", lambda event: self.on_shift_arrow_key(1))
+        self.inner.bind("<Control-a>", lambda event: self.select_all())
+        self.inner.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.inner.bind("<Button-4>", lambda event: self.scroll_units(-3))
+        self.inner.bind("<Button-5>", lambda event: self.scroll_units(3))
+
+    # --- Listbox와 같은 이름의 메서드 (인덱스는 모두 모델 기준) ---
+    def bind(self, sequence=None, func=None, add=None):
+        return self.inner.bind(sequence, func, add)
+
+    def focus_set(self):
+        self.inner.focus_set()
+
+    def size(self):
+        return self.get_count()
+
+    def normalize(self, index):
+        if index == tk.END:
+            return self.get_count() - 1
+        return int(index)
+
+    def curselection(self):
+        return tuple(sorted(self.selected))
+
+    def selection_includes(self, index):
+        return self.normalize(index) in self.selected
+
+    def selection_clear(self, first, last=None):
+        first = self.normalize(first)
+        last = first if last is None else self.normalize(last)
+        self.selected = {i for i in self.selected if not first <= i <= last}
+        self.sync_selection()
+
+    def selection_set(self, first, last=None):
+        first = self.normalize(first)
+        last = first if last is None else self.normalize(last)
+        self.selected.update(range(max(0, first), min(self.get_count() - 1, last) + 1))
+        self.sync_selection()
+
+    def activate(self, index):
+        self.active_index = self.normalize(index)
+        if self.rendered_first <= self.active_index < self.rendered_first + self.rendered_count:
+            self.inner.activate(self.active_index - self.rendered_first)
+
+    def see(self, index):
+        index = self.normalize(index)
+        visible = self.visible_rows()
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + visible:
+            self.top = index - visible + 1
+        else:
+            return
+        self.schedule_render()
+
+    def yview(self, *args):
+        """ 스크롤바 명령(moveto/scroll)을 모델 인덱스로 바꿔 보이는 구간을 옮깁니다. """
+        if not args: return
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * self.get_count())
+        elif args[0] == "scroll":
+            step = self.visible_rows() if args[2] == "pages" else 1
+            self.top += int(args[1]) * step
+        self.render()
+
+    # --- 모델 변경 알림 ---
+    def row_inserted(self, index, count=1):
+        self.selected = {i + count if i >= index else i for i in self.selected}
+        if self.active_index >= index:
+            self.active_index += count
+        if index < self.top:
+            # 보고 있던 행이 밀리지 않도록 스크롤 위치도 함께 옮깁니다.
+            self.top += count
+        self.schedule_render()
+
+    def rows_deleted(self, indices):
+        """ 오름차순 indices의 행이 한꺼번에 지워졌을 때 선택, 활성 행, 스크롤 위치를 맞춥니다. """
+        deleted = set(indices)
+        def shift(i):
+            return i - bisect.bisect_left(indices, i)
+        self.selected = {shift(i) for i in self.selected if i not in deleted}
+        if self.active_index in deleted:
+            self.active_index = -1
+        elif self.active_index != -1:
+            self.active_index = shift(self.active_index)
+        self.top = shift(self.top)
+        self.schedule_render()
+
+    def row_changed(self, index):
+        """ 한 행의 제목이 바뀌었을 때 그 행이 보이는 경우에만 다시 씁니다. """
+        if not self.rendered_first <= index < self.rendered_first + self.rendered_count: return
+        pos = index - self.rendered_first
+        title = self.get_title(index)
+        if self.inner.get(pos) == title: return
+        self.inner.delete(pos)
+        self.inner.insert(pos, title)
+        if index in self.selected:
+            self.inner.selection_set(pos)
+        if index == self.active_index:
+            self.inner.activate(pos)
+
+    def refresh(self):
+        """ 모델 전체가 바뀌었을 때 호출합니다. 범위를 벗어난 선택만 정리하고 다시 그립니다. """
+        count = self.get_count()
+        self.selected = {i for i in self.selected if i < count}
+        if self.active_index >= count:
+            self.active_index = -1
+        self.schedule_render()
+
+    # --- 그리기 ---
+    def visible_rows(self):
+        if not self.row_height_measured and self.rendered_count >= 2:
+            first_box, second_box = self.inner.bbox(0), self.inner.bbox(1)
+            if first_box and second_box:
+                self.row_height = second_box[1] - first_box[1]
+                self.row_height_measured = True
+        return max(1, self.inner.winfo_height() // max(1, self.row_height))
+
+    def schedule_render(self):
+        if self.render_after_id is None:
+            self.render_after_id = self.after_idle(self.render)
+
+    def render(self):
+        if self.render_after_id is not None:
+            self.after_cancel(self.render_after_id)
+            self.render_after_id = None
+        count = self.get_count()
+        visible = self.visible_rows()
+        self.top = max(0, min(self.top, count - visible))
+        first = self.top
+        rows = max(0, min(count - first, visible + self.OVERSCAN))
+        self.inner.delete(0, tk.END)
+        if rows:
+            self.inner.insert(0, *[self.get_title(i) for i in range(first, first + rows)])
+        self.inner.yview_moveto(0)
+        self.rendered_first = first
+        self.rendered_count = rows
+        self.sync_selection()
+        if first <= self.active_index < first + rows:
+            self.inner.activate(self.active_index - first)
+        if count:
+            self.scrollbar.set(first / count, min(1.0, (first + visible) / count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def sync_selection(self):
+        """ 모델 기준 선택을 그려진 행에 반영합니다. 많이 골라도 그려진 행만 살펴봅니다. """
+        self.inner.selection_clear(0, tk.END)
+        first, rows = self.rendered_first, self.rendered_count
+        for i in range(first, first + rows):
+            if i in self.selected:
+                self.inner.selection_set(i - first)
+
+    # --- 입력 처리 ---
+    def select_only(self, index):
+        self.selected = {index}
+        self.anchor_index = index
+        self.set_active(index)
+
+    def select_all(self):
+        count = self.get_count()
+        if count:
+            self.selected = set(range(count))
+            self.set_active(self.active_index if 0 <= self.active_index < count else 0)
+        return "break"
+
+    def select_range_to(self, index):
+        """ 기준 행부터 index까지를 고릅니다. (Shift 클릭, Shift+방향키) """
+        anchor = self.anchor_index if 0 <= self.anchor_index < self.get_count() else index
+        self.selected = set(range(min(anchor, index), max(anchor, index) + 1))
+        self.set_active(index)
+
+    def set_active(self, index):
+        self.active_index = index
+        self.see(index)
+        self.sync_selection()
+        self.activate(index)
+        self.inner.event_generate("<<ListboxSelect>>")
+
+    def row_at(self, y):
+        """ 마우스 위치의 모델 인덱스. 그려진 행이 없거나 범위를 벗어나면 -1입니다. """
+        if not self.rendered_count: return -1
+        index = self.rendered_first + self.inner.nearest(y)
+        return index if 0 <= index < self.get_count() else -1
+
+    def on_click(self, event):
+        self.inner.focus_set()
+        index = self.row_at(event.y)
+        if index == -1: return "break"
+        self.press_index = index
+        # 여러 행을 고른 상태에서 고른 행을 누르면 끌어 옮길 수 있도록, 선택은 끌지 않고 놓을 때 바꿉니다.
+        if index not in self.selected or len(self.selected) == 1:
+            self.select_only(index)
+        return "break"
+
+    def on_shift_click(self, event):
+        self.inner.focus_set()
+        index = self.row_at(event.y)
+        if index != -1:
+            self.select_range_to(index)
+        return "break"
+
+    def on_control_click(self, event):
+        self.inner.focus_set()
+        index = self.row_at(event.y)
+        if index == -1: return "break"
+        if index in self.selected:
+            self.selected.discard(index)
+        else:
+            self.selected.add(index)
+        self.anchor_index = index
+        self.set_active(index)
+        return "break"
+
+    def drop_position(self, y):
+        """ 마우스 위치에서 놓을 자리. 행의 아래쪽 절반이면 그 행 뒤입니다. """
+        if not self.rendered_count: return 0
+        row = self.inner.nearest(y)
+        box = self.inner.bbox(row)
+        index = self.rendered_first + row
+        if box and y > box[1] + box[3] // 2:
+            index += 1
+        return max(0, min(self.get_count(), index))
+
+    def on_drag(self, event):
+        if self.press_index is None or not self.selected: return "break"
+        self.drag_y = event.y
+        # 목록 위아래 가장자리 밖으로 끌면 마우스를 움직이지 않아도 놓을 때까지 스크롤합니다.
+        if self.autoscan_after_id is None and not 0 <= event.y <= self.inner.winfo_height():
+            self.autoscan()
+        drop = self.drop_position(event.y)
+        if not self.dragging and drop in (self.press_index, self.press_index + 1): return "break"
+        self.dragging = True
+        self.show_drop_line(drop)
+        return "break"
+
+    def autoscan(self):
+        """ 마우스가 목록 위나 아래 밖에 있는 동안 AUTOSCAN_MS마다 한 줄씩 스크롤하고 놓을 자리를 따라 옮깁니다. """
+        self.autoscan_after_id = None
+        if self.press_index is None: return
+        if self.drag_y < 0:
+            self.scroll_units(-1)
+        elif self.drag_y > self.inner.winfo_height():
+            self.scroll_units(1)
+        else:
+            return
+        if self.dragging:
+            self.show_drop_line(self.drop_position(self.drag_y))
+        self.autoscan_after_id = self.after(self.AUTOSCAN_MS, self.autoscan)
+
+    def stop_autoscan(self):
+        if self.autoscan_after_id is not None:
+            self.after_cancel(self.autoscan_after_id)
+            self.autoscan_after_id = None
+
+    def show_drop_line(self, drop):
+        self.drop_index = drop
+        row = drop - self.rendered_first
+        box = None
+        if 0 <= row < self.rendered_count:
+            box = self.inner.bbox(row)
+            y = box[1] if box else 0
+        elif row == self.rendered_count and row > 0:
+            box = self.inner.bbox(row - 1)
+            y = box[1] + box[3] if box else 0
+        if box is None:
+            self.drop_line.place_forget()
+            return
+        self.drop_line.place(in_=self.inner, x=0, y=max(0, y - 1), relwidth=1.0)
+
+    def on_release(self, event):
+        self.stop_autoscan()
+        if self.dragging:
+            self.dragging = False
+            self.drop_line.place_forget()
+            self.inner.event_generate("<<ListboxDrop>>")
+        elif self.press_index is not None and self.press_index in self.selected and len(self.selected) > 1:
+            # 끌지 않고 놓았으면 보통 클릭처럼 그 행만 고릅니다.
+            self.select_only(self.press_index)
+        self.press_index = None
+        return "break"
+
+    def on_arrow_key(self, step):
+        count = self.get_count()
+        if not count: return "break"
+        current = self.active_index if self.active_index != -1 else -step
+        self.select_only(max(0, min(count - 1, current + step)))
+        return "break"
+
+    def on_shift_arrow_key(self, step):
+        count = self.get_count()
+        if not count or self.active_index == -1: return "break"
+        self.select_range_to(max(0, min(count - 1, self.active_index + step)))
+        return "break"
+
+    def on_mouse_wheel(self, event):
+        units = -event.delta // 120 or (-1 if event.delta > 0 else 1)
+        return self.scroll_units(units * 3)
+
+    def scroll_units(self, units):
+        self.yview("scroll", units, "units")
+        return "break"
+
+class NgramIndex:
+    """ 메모 제목과 내용의 글자 n-gram(기본 2글자)으로 만든 메모리 내 역색인
+
+    띄어쓰기 없이 이어지는 한국어 문장도 부분 문자열로 찾을 수 있습니다. 메모 객체 자체를 문서로 삼아
+    Memo.id로 구분하므로 메모의 순서가 바뀌어도 색인을 고칠 필요가 없습니다.
+    삭제나 수정 때 예전 n-gram을 하나씩 지우지 않고 남겨 두므로, candidates는 실제로 포함하지 않는 메모를
+    돌려줄 수 있습니다. 포함 여부는 호출하는 쪽에서 확인하고, 남은 항목이 살아 있는 항목보다 많아지면 다시 만듭니다.
+    편집 중인 메모는 stale로만 표시해 두고 검색 직전이나 메모를 바꿀 때 다시 색인합니다.
+    """
+    N = 2
+
+    def __init__(self):
+        self.built = False
+        self.postings = {}
+        self.docs = {}
+        self.doc_sizes = {}
+        self.live_size = 0
+        self.garbage_size = 0
+        self.stale = set()
+
+    @classmethod
+    def grams(cls, text):
+        text = text.lower()
+        return {text[i:i + cls.N] for i in range(len(text) - cls.N + 1)}
+
+    def build(self, memos, contents):
+        self.reset()
+        for memo, content in zip(memos, contents):
+            self.index_doc(memo, content)
+        self.built = True
+
+    def reset(self):
+        self.built = False
+        self.postings.clear()
+        self.docs.clear()
+        self.doc_sizes.clear()
+        self.live_size = 0
+        self.garbage_size = 0
+        self.stale.clear()
+
+    def index_doc(self, memo, content):
+        key = memo.id
+        grams = self.grams(memo.title) | self.grams(content)
+        self.docs[key] = memo
+        self.doc_sizes[key] = len(grams)
+        self.live_size += len(grams)
+        postings = self.postings
+        for gram in grams:
+            keys = postings.get(gram)
+            if keys is None:
+                postings[gram] = {key}
+            else:
+                keys.add(key)
+
+    def forget_doc(self, key):
+        size = self.doc_sizes.pop(key, 0)
+        self.live_size -= size
+        self.garbage_size += size
+        self.docs.pop(key, None)
+        self.stale.discard(key)
+
+    def add(self, memo):
+        if self.built:
+            self.index_doc(memo, memo.content)
+
+    def remove(self, memo):
+        if self.built:
+            self.forget_doc(memo.id)
+
+    def mark_stale(self, memo):
+        if self.built and memo.id in self.docs:
+            self.stale.add(memo.id)
+
+    def refresh_stale(self):
+        """ 편집된 메모를 다시 색인합니다. 메모 내용이 메모리에 있는 동안 호출해야 합니다. """
+        for key in list(self.stale):
+            memo = self.docs[key]
+            self.forget_doc(key)
+            self.index_doc(memo, memo.content)
+        if self.garbage_size > max(self.live_size, 100000):
+            # 지난 n-gram이 너무 많이 쌓이면 다음 검색 때 새로 만듭니다.
+            self.reset()
+
+    def candidates(self, query, memos):
+        """ query의 n-gram을 모두 가진 메모들을 돌려줍니다. N보다 짧은 검색어는 모든 메모가 후보입니다. """
+        grams = self.grams(query)
+        if not grams:
+            return list(memos)
+        postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        keys = set(postings[0])
+        for other in postings[1:]:
+            keys &= other
+            if not keys: break
+        docs = self.docs
+        return [docs[key] for key in keys if key in docs]
+
+class FuzzyMatcher:
+    """ 빠른 전환 창에서 쓰는 제목 퍼지 검색
+
+    검색어의 글자가 제목에 순서대로 모두 나오면 일치로 보고 점수를 매깁니다. 검색어가 길어지면 일치하는 제목은
+    줄어들기만 하므로, 캐시된 가장 긴 접두어의 일치 목록만 다시 살펴봅니다. 점수 계산은 step으로 시간을 나눠
+    진행하므로 제목이 아주 많아도 한 번에 UI를 오래 붙잡지 않고, 결과는 상위 limit개만 유지합니다.
+    """
+    CHUNK = 512
+
+    def __init__(self, titles, limit=50):
+        self.titles = [title.lower() for title in titles]
+        self.limit = limit
+        # 검색어 → (일치한 인덱스 목록, 상위 결과)
+        self.cache = {}
+        self.query = ""
+        self.candidates = []
+        self.pos = 0
+        self.matched = []
+        self.heap = []
+
+    @staticmethod
+    def score(query, title):
+        """ title이 query의 글자를 순서대로 모두 포함하면 점수를, 아니면 None을 돌려줍니다. """
+        found = title.find(query)
+        if found != -1:
+            # 연속으로 포함되면 가장 높게, 앞쪽일수록 높게 칩니다.
+            return 1000 - found * 2 - len(title) // 10
+        score = 0
+        last = -1
+        for ch in query:
+            found = title.find(ch, last + 1)
+            if found == -1:
+                return None
+            if found == last + 1:
+                score += 5
+            elif found == 0 or title[found - 1] in " _-":
+                score += 3
+            score -= min(found - last - 1, 10)
+            last = found
+        return score - len(title) // 10
+
+    def start(self, query):
+        self.query = query.lower()
+        if not self.query or self.query in self.cache: return
+        self.candidates = self.base_candidates(self.query)
+        self.pos = 0
+        self.matched = []
+        self.heap = []
+
+    def base_candidates(self, query):
+        for end in range(len(query) - 1, 0, -1):
+            cached = self.cache.get(query[:end])
+            if cached is not None:
+                return cached[0]
+        return range(len(self.titles))
+
+    def step(self, budget):
+        """ budget(초) 동안 후보의 점수를 매깁니다. 검색이 끝나면 True를 돌려줍니다. """
+        if not self.query or self.query in self.cache: return True
+        deadline = time.perf_counter() + budget
+        query, titles, score = self.query, self.titles, self.score
+        heap, matched, limit = self.heap, self.matched, self.limit
+        while self.pos < len(self.candidates):
+            for index in self.candidates[self.pos:self.pos + self.CHUNK]:
+                value = score(query, titles[index])
+                if value is None: continue
+                matched.append(index)
+                # 점수가 같으면 목록 앞쪽 메모가 먼저 오도록 -index를 함께 넣습니다.
+                if len(heap) < limit:
+                    heapq.heappush(heap, (value, -index))
+                elif (value, -index) > heap[0]:
+                    heapq.heapreplace(heap, (value, -index))
+            self.pos += self.CHUNK
+            if time.perf_counter() >= deadline:
+                return False
+        self.cache[query] = (matched, self.ranked())
+        return True
+
+    def ranked(self):
+        return [-neg_index for _, neg_index in sorted(self.heap, reverse=True)]
+
+    def results(self):
+        """ 지금까지의 상위 결과를 메모 인덱스 목록으로 돌려줍니다. """
+        if not self.query:
+            return list(range(min(self.limit, len(self.titles))))
+        cached = self.cache.get(self.query)
+        return cached[1] if cached else self.ranked()
+
+PERF_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+class PerfStats:
+    """ 성능 측정 기록. 켜져 있을 때만 처리 시간 분포, 이벤트 루프 지연, 저장 횟수와 쓴 바이트 수를 모읍니다.
+
+    환경 변수 ALPACA_PERF=1 또는 설정 메뉴로 켭니다. 꺼져 있으면 측정 지점마다 플래그를 한 번 확인할 뿐입니다.
+    작업 스레드에서도 기록하므로 잠금으로 보호합니다.
+    """
+    HEARTBEAT_MS = 100
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.heartbeat_after_id = None
+        self.heartbeat_due = 0.0
+        # 시작 시간 같은 한 번뿐인 측정값. 측정이 꺼져 있어도 기록하며 초기화하지 않습니다.
+        self.marks = {}
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            # 이름 → [횟수, 합계(ms), 최대(ms), PERF_BUCKETS_MS 구간별 횟수]
+            self.timings = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def record(self, name, seconds):
+        ms = seconds * 1000
+        with self.lock:
+            entry = self.timings.get(name)
+            if entry is None:
+                entry = self.timings[name] = [0, 0.0, 0.0, [0] * (len(PERF_BUCKETS_MS) + 1)]
+            entry[0] += 1
+            entry[1] += ms
+            entry[2] = max(entry[2], ms)
+            entry[3][bisect.bisect_left(PERF_BUCKETS_MS, ms)] += 1
+
+    def mark(self, name, seconds):
+        self.marks[name] = round(seconds * 1000, 1)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def start_heartbeat(self, root):
+        """ HEARTBEAT_MS마다 root.after를 걸고, 예정보다 늦게 불린 시간을 이벤트 루프 지연으로 기록합니다. """
+        if self.heartbeat_after_id is None:
+            self.schedule_heartbeat(root)
+
+    def stop_heartbeat(self, root):
+        if self.heartbeat_after_id is not None:
+            root.after_cancel(self.heartbeat_after_id)
+            self.heartbeat_after_id = None
+
+    def schedule_heartbeat(self, root):
+        self.heartbeat_due = time.perf_counter() + self.HEARTBEAT_MS / 1000
+        self.heartbeat_after_id = root.after(self.HEARTBEAT_MS, self.heartbeat, root)
+
+    def heartbeat(self, root):
+        self.heartbeat_after_id = None
+        if not self.enabled: return
+        self.record("event_loop_stall", max(0.0, time.perf_counter() - self.heartbeat_due))
+        self.schedule_heartbeat(root)
+
+    def snapshot(self):
+        """ 지금까지의 기록을 JSON으로 쓸 수 있는 딕셔너리로 돌려줍니다. 백분위수는 구간의 위쪽 경계로 어림합니다. """
+        with self.lock:
+            timings = {name: (count, total, peak, list(buckets)) for name, (count, total, peak, buckets) in self.timings.items()}
+            counters = dict(self.counters)
+            started = self.started
+
+        def percentile(buckets, count, peak, q):
+            target = q / 100 * count
+            seen = 0
+            for i, n in enumerate(buckets):
+                seen += n
+                if seen >= target:
+                    return min(PERF_BUCKETS_MS[i], peak) if i < len(PERF_BUCKETS_MS) else peak
+            return peak
+
+        result = {}
+        for name, (count, total, peak, buckets) in sorted(timings.items()):
+            labels = [f"<={edge}ms" for edge in PERF_BUCKETS_MS] + [f">{PERF_BUCKETS_MS[-1]}ms"]
+            result[name] = {
+                "count": count,
+                "mean_ms": round(total / count, 3),
+                "p50_ms": round(percentile(buckets, count, peak, 50), 3),
+                "p95_ms": round(percentile(buckets, count, peak, 95), 3),
+                "max_ms": round(peak, 3),
+                "histogram": {label: n for label, n in zip(labels, buckets) if n},
+            }
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+            "elapsed_s": round(time.time() - started, 1),
+            "startup_ms": dict(self.marks),
+            "timings": result,
+            "counters": counters,
+        }
+
+    def format_report(self):
+        """ 통계 창에 보여줄 표 형태의 글을 만듭니다. """
+        snapshot = self.snapshot()
+        lines = [f"측정 시작: {snapshot['started']} ({snapshot['elapsed_s']}초 경과)"]
+        startup = snapshot["startup_ms"]
+        if startup:
+            lines.append(f"프로그램 시작: 첫 화면 {startup.get('time_to_first_paint', '-')} ms, "
+                         f"사용 가능 {startup.get('time_to_interactive', '-')} ms")
+        lines.append("")
+        lines.append(f"{'이름':<28}{'횟수':>8}{'평균':>10}{'p50':>10}{'p95':>10}{'최대':>10}  (ms)")
+        for name, t in snapshot["timings"].items():
+            lines.append(f"{name:<28}{t['count']:>8}{t['mean_ms']:>10.2f}{t['p50_ms']:>10.2f}{t['p95_ms']:>10.2f}{t['max_ms']:>10.2f}")
+            lines.append("    " + "  ".join(f"{label}:{n}" for label, n in t["histogram"].items()))
+        if snapshot["counters"]:
+            lines.append("")
+            for name, value in sorted(snapshot["counters"].items()):
+                lines.append(f"{name:<28}{value:>14,}")
+        return "\n".join(lines)
+
+def perf_timed(func):
+    """ MemoApp 메서드의 실행 시간을 self.perf에 기록합니다. 측정이 꺼져 있으면 바로 원래 함수를 부릅니다. """
+    name = func.__name__
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if not self.perf.enabled:
+            return func(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self.perf.record(name, time.perf_counter() - start)
+    return wrapper
 
 class MemoApp:
+    # 저장에 실패했을 때 다시 시도하기까지의 시간
+    SAVE_RETRY_MS = 10000
+    # 다른 메모장이 잠금을 잡고 있어 불러오지 못했을 때 다시 시도하기까지의 시간
+    LOAD_RETRY_MS = 1000
+
     def __init__(self, root):
         self.root = root
         self.root.title("알파카 메모장")
         self.file_path = "memos.json"
         self.settings_file = "settings.ini"
-        self.memos = self.load_memos()
+        self.perf = PerfStats(os.environ.get("ALPACA_PERF") == "1")
+        self.io_worker = IOWorker(root)
         self.settings = self.load_settings()
+        self.store = self.create_store()
+        # 같은 메모 파일을 여는 다른 메모장과 읽기·쓰기가 겹치지 않게 합니다.
+        self.lock = NotebookLock(self.file_path + ".lock")
+        # 다른 곳에서 파일을 바꿨는지 지켜보는 상태. sync_base는 마지막으로 파일과 맞춘 (메모, 제목, 내용) 목록입니다.
+        watch_paths = self.store.watch_paths()
+        self.watch = FileWatch(watch_paths) if watch_paths else None
+        self.sync_base = []
+        self.external_check_job = None
+        self.external_after_id = None
+        self.external_conflict = False
+        self.closing = False
+        # 메모는 창을 먼저 그린 뒤 작업 스레드에서 불러옵니다. 다 불러오기 전에는 목록을 바꾸는 명령을 막습니다.
+        self.memos = []
+        self.memos_loaded = False
+        # 덮어쓰기로 가져온 메모를 묶음으로 넣는 중이면 (가져온 메모, 다음 묶음 시작, after id)
+        self.import_batches = None
         self.current_index = -1
+        self.font_families = None
+        # 메모 목록 작업의 되돌리기 기록: ("delete", [(자리, 메모), ...]), ("insert", [메모, ...])
+        # 또는 ("move", [(옮기기 전 자리, 메모), ...])
+        self.undo_stack = []
+
+        # 검색 색인은 처음 검색할 때 만들고, 이후로는 편집 경로에서 조금씩 고칩니다.
+        self.search_index = NgramIndex()
+        self.positions_cache = None
+        self.search_query = ""
+        self.search_after_id = None
+        self.quick_switcher = None
+
+        # 큰 메모 상태: 나눠 넣는 중인 작업과, 쪽 단위로 볼 때의 쪽 목록
+        self.content_load_after_id = None
+        self.content_pages = None
+        self.content_page = 0
+        self.content_notes = ""
+        # content_text가 편집 중인 메모보다 새로우면 True. 내용은 필요할 때만 읽어 옵니다.
+        self.content_modified = False
+
+        # 자동 저장 상태: 변경이 있을 때만 저장하고, 연속 입력은 한 번의 저장으로 합칩니다.
+        self.dirty = False
+        self.dirty_since = None
+        self.autosave_after_id = None
+        # 저장에 실패한 뒤 아직 한 번도 성공하지 못했으면 True. 재시도마다 오류 창을 띄우지 않게 합니다.
+        self.save_failed = False
+
+        # 수정 기록: 마지막 기록 뒤로 바뀐 메모(Memo.id -> (메모, 고치기 전 상태))와 메모별 마지막 기록 시각
+        self.history = None
+        if self.settings['history_enabled']:
+            self.history = MemoHistory(
+                os.path.splitext(self.file_path)[0] + ".history", self.settings['history_max_revisions'],
+                self.settings['history_max_kb'] * 1024, self.settings['history_keyframe_every']
+            )
+        self.history_pending = {}
+        self.history_times = {}
 
         self.root.geometry("800x600")
         
@@ -34,22 +2264,35 @@ class MemoApp:
         main_pane.add(left_panel, width=250)
         main_pane.paneconfig(left_panel, minsize=200)
 
+        search_frame = tk.Frame(left_panel)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        self.search_entry = tk.Entry(search_frame, font=self.ui_font)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.search_entry.bind("<KeyRelease>", self.on_search_key)
+        self.search_entry.bind("<Return>", lambda event: self.search_next(1))
+        self.search_entry.bind("<Shift-Return>", lambda event: self.search_next(-1))
+        self.search_entry.bind("<Escape>", self.clear_search)
+        tk.Button(search_frame, text="◀", command=lambda: self.search_next(-1)).pack(side=tk.LEFT)
+        tk.Button(search_frame, text="▶", command=lambda: self.search_next(1)).pack(side=tk.LEFT)
+        self.search_status = tk.Label(left_panel, text="", font=self.ui_font, anchor="w")
+        self.search_status.pack(fill=tk.X)
+
         list_frame = tk.Frame(left_panel)
         list_frame.pack(fill=tk.BOTH, expand=True)
 
-        self.listbox = tk.Listbox(list_frame, exportselection=False, font=self.ui_font)
+        self.listbox = VirtualListbox(
+            list_frame, lambda index: self.memos[index].title, lambda: len(self.memos), font=self.ui_font
+        )
         self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.listbox.bind("<<ListboxSelect>>", self.on_memo_select)
+        self.listbox.bind("<<ListboxDrop>>", lambda event: self.move_memos(self.listbox.curselection(), self.listbox.drop_index))
         self.listbox.bind("<Delete>", lambda event: self.remove_memo())
+        self.listbox.bind("<Control-d>", lambda event: self.duplicate_memos())
+        self.listbox.bind("<Control-z>", lambda event: self.undo_memo_change())
         # Home/End 키 단축키 추가
         self.listbox.bind("<Home>", self.on_home_key)
         self.listbox.bind("<End>", self.on_end_key)
 
-
-        scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.listbox.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.listbox.config(yscrollcommand=scrollbar.set)
-
         self.update_listbox()
 
         button_frame = tk.Frame(left_panel)
@@ -78,34 +2321,95 @@ class MemoApp:
 
         content_label = tk.Label(right_panel, text="메모 내용", font=self.ui_font)
         content_label.pack(anchor="w")
+        # 큰 메모를 열었을 때만 보이는 안내줄과 쪽 이동 버튼
+        self.large_memo_frame = tk.Frame(right_panel)
+        self.large_memo_label = tk.Label(self.large_memo_frame, font=self.ui_font, fg="#a05000", anchor="w", justify=tk.LEFT)
+        self.large_memo_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.next_page_button = tk.Button(self.large_memo_frame, text="▶", width=3, command=lambda: self.show_content_page(self.content_page + 1))
+        self.next_page_button.pack(side=tk.RIGHT)
+        self.prev_page_button = tk.Button(self.large_memo_frame, text="◀", width=3, command=lambda: self.show_content_page(self.content_page - 1))
+        self.prev_page_button.pack(side=tk.RIGHT)
         self.content_text = tk.Text(right_panel, font=self.content_font)
         self.content_text.pack(fill=tk.BOTH, expand=True)
-        self.content_text.bind("<KeyRelease>", self.update_memo_realtime)
+        self.content_text.tag_config("search_hit", background="yellow")
+        self.content_text.bind("<<Modified>>", self.on_content_modified)
         # 위젯 레벨 바인딩: 기본 동작을 덮어쓰기 위해 유지
         self.content_text.bind("<Control-t>", self.focus_on_title)
+        self.content_text.bind("<Control-p>", self.open_quick_switcher)
         
         # 전역 단축키 바인딩
         self.root.bind("<Control-n>", lambda event: self.add_memo())
         self.root.bind("<Prior>", lambda event: self.move_memo_up())
         self.root.bind("<Next>", lambda event: self.move_memo_down())
         self.root.bind("<Control-l>", self.focus_on_listbox)
+        self.root.bind("<Control-f>", self.focus_on_search)
+        self.root.bind("<Control-p>", self.open_quick_switcher)
         # 전역 단축키를 다시 추가하여 어디서든 동작하도록 함
         self.root.bind("<Control-t>", self.focus_on_title)
 
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.toggle_right_panel(False)
+        if self.perf.enabled:
+            self.perf.start_heartbeat(self.root)
+
+        self.search_status.config(text="메모를 불러오는 중...")
+        self.root.after_idle(lambda: self.perf.mark("time_to_first_paint", time.perf_counter() - STARTUP_STARTED))
+        self.start_loading()
+
+    def start_loading(self):
+        self.io_worker.submit(lambda job: self.load_memos(), on_done=self.on_memos_loaded, on_error=self.on_load_error)
+
+    def on_memos_loaded(self, memos):
+        self.memos = memos
+        self.memos_loaded = True
+        self.search_status.config(text="")
+        self.update_listbox()
+        self.schedule_external_check()
+        # 목록 그리기도 유휴 작업이므로 그 뒤에 재면 목록이 채워진 시점이 됩니다.
+        self.root.after_idle(lambda: self.perf.mark("time_to_interactive", time.perf_counter() - STARTUP_STARTED))
+
+    def on_load_error(self, e):
+        if isinstance(e, TimeoutError):
+            # 다른 메모장이 파일을 쓰는 중이면 오류로 끝내지 않고 잠금이 풀릴 때까지 다시 시도합니다.
+            if self.closing: return
+            self.search_status.config(text="다른 메모장이 메모 파일을 쓰고 있어 기다리는 중...")
+            self.root.after(self.LOAD_RETRY_MS, self.start_loading)
+            return
+        # 불러오지 못한 상태에서 저장하면 기존 파일을 덮어쓸 수 있으므로 계속 막아 둡니다.
+        self.search_status.config(text="메모를 불러오지 못했습니다.")
+        messagebox.showerror("오류", f"메모를 불러오는 중 오류가 발생했습니다:\n{e}")
 
     def create_menu(self):
         menubar = tk.Menu(self.root)
         file_menu = tk.Menu(menubar, tearoff=0)
         file_menu.add_command(label="메모 가져오기...", command=self.import_memos)
+        file_menu.add_command(label="폴더에서 메모 가져오기...", command=self.import_folder)
         file_menu.add_command(label="메모 내보내기...", command=self.export_memos)
+        file_menu.add_command(label="선택한 메모 내보내기...", command=self.export_selected_memos)
+        file_menu.add_command(label="검색 결과 내보내기...", command=self.export_search_results)
+        file_menu.add_separator()
+        file_menu.add_command(label="증분 백업...", command=self.backup_memos)
+        file_menu.add_command(label="백업에서 복원...", command=self.restore_backup)
+        file_menu.add_separator()
+        file_menu.add_command(label="메모 빠른 이동...", command=self.open_quick_switcher)
+        file_menu.add_command(label="메모 기록...", command=self.open_history)
         file_menu.add_separator()
-        file_menu.add_command(label="종료", command=self.root.quit)
+        file_menu.add_command(label="종료", command=self.on_closing)
         menubar.add_cascade(label="파일", menu=file_menu)
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="되돌리기 (Ctrl+Z)", command=self.undo_memo_change)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="모두 선택 (Ctrl+A)", command=self.select_all_memos)
+        edit_menu.add_command(label="선택한 메모 복제 (Ctrl+D)", command=self.duplicate_memos)
+        edit_menu.add_command(label="선택한 메모 제거 (Delete)", command=self.remove_memo)
+        menubar.add_cascade(label="편집", menu=edit_menu)
         settings_menu = tk.Menu(menubar, tearoff=0)
         settings_menu.add_command(label="글꼴 설정...", command=self.open_font_settings)
+        settings_menu.add_separator()
+        self.perf_var = tk.BooleanVar(value=self.perf.enabled)
+        settings_menu.add_checkbutton(label="성능 측정", variable=self.perf_var, command=self.toggle_perf)
+        settings_menu.add_command(label="성능 통계...", command=self.open_perf_stats)
         menubar.add_cascade(label="설정", menu=settings_menu)
         self.root.config(menu=menubar)
 
@@ -117,6 +2421,103 @@ class MemoApp:
             self.listbox.activate(self.current_index)
         return "break"
 
+    def focus_on_search(self, event=None):
+        """ 검색창으로 포커스를 이동하고 전체 선택합니다. """
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, tk.END)
+        return "break"
+
+    def open_quick_switcher(self, event=None):
+        """ 제목 일부를 입력해 메모로 바로 이동하는 빠른 전환 창을 엽니다. (Ctrl+P) """
+        if self.quick_switcher is not None and self.quick_switcher.winfo_exists():
+            self.quick_switcher.lift()
+            return "break"
+
+        switcher_win = Toplevel(self.root)
+        switcher_win.title("메모 빠른 이동")
+        switcher_win.geometry("400x320")
+        switcher_win.transient(self.root)
+        switcher_win.grab_set()
+        self.quick_switcher = switcher_win
+
+        query_entry = tk.Entry(switcher_win, font=self.ui_font)
+        query_entry.pack(fill=tk.X, padx=5, pady=5)
+        results_box = tk.Listbox(switcher_win, font=self.ui_font, exportselection=False)
+        results_box.pack(fill=tk.BOTH, expand=True, padx=5, pady=(0, 5))
+
+        # 결과는 창을 열 때의 목록 기준 위치이므로, 다른 곳의 변경이 합쳐져도 되도록 메모 객체로 바꿔 씁니다.
+        memos = list(self.memos)
+        matcher = FuzzyMatcher([memo.title for memo in memos])
+        state = {"after_id": None, "shown": []}
+
+        def show(indices):
+            if indices == state["shown"]: return
+            state["shown"] = indices
+            results_box.delete(0, tk.END)
+            if indices:
+                results_box.insert(0, *[memos[i].title for i in indices])
+                results_box.selection_set(0)
+                results_box.activate(0)
+
+        def run_step():
+            # 한 번에 한 프레임(약 8ms) 정도만 계산하고 나머지는 다음 차례로 미룹니다.
+            state["after_id"] = None
+            done = matcher.step(0.008)
+            show(matcher.results())
+            if not done:
+                state["after_id"] = switcher_win.after(1, run_step)
+
+        def on_key(event):
+            if event.keysym in ("Up", "Down", "Return", "Escape"): return
+            if state["after_id"] is not None:
+                switcher_win.after_cancel(state["after_id"])
+            matcher.start(query_entry.get())
+            run_step()
+
+        def move(step):
+            size = results_box.size()
+            if not size: return "break"
+            selected = results_box.curselection()
+            index = max(0, min(size - 1, (selected[0] if selected else -1) + step))
+            results_box.selection_clear(0, tk.END)
+            results_box.selection_set(index)
+            results_box.activate(index)
+            results_box.see(index)
+            return "break"
+
+        def close(event=None):
+            if state["after_id"] is not None:
+                switcher_win.after_cancel(state["after_id"])
+            switcher_win.destroy()
+            self.quick_switcher = None
+
+        def choose(event=None):
+            selected = results_box.curselection()
+            if not selected: return "break"
+            index = self.memo_positions().get(memos[state["shown"][selected[0]]].id)
+            close()
+            # 창을 열어 둔 사이 다른 곳에서 지운 메모였으면 옮겨 가지 않습니다.
+            if index is None: return "break"
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(index)
+            self.listbox.activate(index)
+            self.listbox.see(index)
+            self.on_memo_select(None)
+            self.listbox.focus_set()
+            return "break"
+
+        query_entry.bind("<KeyRelease>", on_key)
+        query_entry.bind("<Up>", lambda event: move(-1))
+        query_entry.bind("<Down>", lambda event: move(1))
+        query_entry.bind("<Return>", choose)
+        query_entry.bind("<Escape>", close)
+        results_box.bind("<Double-Button-1>", choose)
+        results_box.bind("<Return>", choose)
+        switcher_win.protocol("WM_DELETE_WINDOW", close)
+        show(matcher.results())
+        query_entry.focus_set()
+        return "break"
+
     def focus_on_title(self, event=None):
         """메모 제목으로 포커스를 이동하고 전체 선택합니다."""
         if self.title_entry.cget('state') == tk.NORMAL:
@@ -155,19 +2556,75 @@ class MemoApp:
     def load_settings(self):
         """ .ini 설정 파일을 읽어옵니다. """
         config = configparser.ConfigParser()
-        default_settings = {'font_family': '굴림체', 'font_size': 12}
+        default_settings = {
+            'font_family': '굴림체', 'font_size': 12,
+            'autosave_delay_ms': 800, 'autosave_max_delay_ms': 5000,
+            'storage_format': 'json', 'journal_compact_kb': 1024,
+            'storage_compression': 'none', 'compression_level': 6, 'watch_ms': 2000,
+            'large_memo_kb': 256, 'paged_memo_kb': 4096, 'long_line_chars': 10000,
+            'history_enabled': True, 'history_max_revisions': 100, 'history_max_kb': 1024,
+            'history_keyframe_every': 20, 'history_interval_s': 60
+        }
 
         if not os.path.exists(self.settings_file):
-            return default_settings
+            return self.migrate_legacy_settings(default_settings)
         
         try:
             config.read(self.settings_file, encoding='utf-8')
             font_family = config.get('Font', 'family', fallback=default_settings['font_family'])
             font_size = config.getint('Font', 'size', fallback=default_settings['font_size'])
-            return {'font_family': font_family, 'font_size': font_size}
+            autosave_delay = config.getint('Autosave', 'delay_ms', fallback=default_settings['autosave_delay_ms'])
+            autosave_max_delay = config.getint('Autosave', 'max_delay_ms', fallback=default_settings['autosave_max_delay_ms'])
+            storage_format = config.get('Storage', 'format', fallback=default_settings['storage_format'])
+            journal_compact_kb = config.getint('Storage', 'journal_compact_kb', fallback=default_settings['journal_compact_kb'])
+            storage_compression = config.get('Storage', 'compression', fallback=default_settings['storage_compression']).strip().lower()
+            compression_level = config.getint('Storage', 'compression_level', fallback=default_settings['compression_level'])
+            watch_ms = config.getint('Storage', 'watch_ms', fallback=default_settings['watch_ms'])
+            large_memo_kb = config.getint('LargeMemo', 'chunked_kb', fallback=default_settings['large_memo_kb'])
+            paged_memo_kb = config.getint('LargeMemo', 'paged_kb', fallback=default_settings['paged_memo_kb'])
+            long_line_chars = config.getint('LargeMemo', 'long_line_chars', fallback=default_settings['long_line_chars'])
+            history_enabled = config.getboolean('History', 'enabled', fallback=default_settings['history_enabled'])
+            history_max_revisions = config.getint('History', 'max_revisions', fallback=default_settings['history_max_revisions'])
+            history_max_kb = config.getint('History', 'max_kb', fallback=default_settings['history_max_kb'])
+            history_keyframe_every = config.getint('History', 'keyframe_every', fallback=default_settings['history_keyframe_every'])
+            history_interval_s = config.getint('History', 'interval_s', fallback=default_settings['history_interval_s'])
+            return {
+                'font_family': font_family, 'font_size': font_size,
+                'autosave_delay_ms': max(0, autosave_delay),
+                'autosave_max_delay_ms': max(0, autosave_max_delay),
+                'storage_format': storage_format.strip().lower(),
+                'journal_compact_kb': max(1, journal_compact_kb),
+                'storage_compression': storage_compression if storage_compression in STORAGE_COMPRESSIONS else 'none',
+                'compression_level': min(9, max(0, compression_level)),
+                'watch_ms': max(0, watch_ms),
+                'large_memo_kb': max(1, large_memo_kb),
+                'paged_memo_kb': max(1, paged_memo_kb),
+                'long_line_chars': max(1, long_line_chars),
+                'history_enabled': history_enabled,
+                'history_max_revisions': max(1, history_max_revisions),
+                'history_max_kb': max(1, history_max_kb),
+                'history_keyframe_every': max(1, history_keyframe_every),
+                'history_interval_s': max(0, history_interval_s)
+            }
         except (configparser.Error, ValueError):
             return default_settings
 
+    def migrate_legacy_settings(self, settings):
+        """ 이전 버전의 settings.json이 있으면 글꼴 설정을 가져와 settings.ini로 한 번 옮깁니다. """
+        legacy_file = "settings.json"
+        if not os.path.exists(legacy_file):
+            return settings
+        try:
+            with open(legacy_file, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            settings['font_family'] = legacy.get('font_family', settings['font_family'])
+            settings['font_size'] = int(legacy.get('font_size', settings['font_size']))
+        except (json.JSONDecodeError, IOError, AttributeError, ValueError, TypeError):
+            return settings
+        self.settings = settings
+        self.save_settings()
+        return settings
+
     def save_settings(self):
         """ 설정을 .ini 파일에 저장합니다. """
         config = configparser.ConfigParser()
@@ -175,9 +2632,90 @@ class MemoApp:
             'family': self.settings.get('font_family', '굴림체'),
             'size': str(self.settings.get('font_size', 12))
         }
+        config['Autosave'] = {
+            'delay_ms': str(self.settings.get('autosave_delay_ms', 800)),
+            'max_delay_ms': str(self.settings.get('autosave_max_delay_ms', 5000))
+        }
+        config['Storage'] = {
+            'format': self.settings.get('storage_format', 'json'),
+            'journal_compact_kb': str(self.settings.get('journal_compact_kb', 1024)),
+            'compression': self.settings.get('storage_compression', 'none'),
+            'compression_level': str(self.settings.get('compression_level', 6)),
+            'watch_ms': str(self.settings.get('watch_ms', 2000))
+        }
+        config['LargeMemo'] = {
+            'chunked_kb': str(self.settings.get('large_memo_kb', 256)),
+            'paged_kb': str(self.settings.get('paged_memo_kb', 4096)),
+            'long_line_chars': str(self.settings.get('long_line_chars', 10000))
+        }
+        config['History'] = {
+            'enabled': str(self.settings.get('history_enabled', True)).lower(),
+            'max_revisions': str(self.settings.get('history_max_revisions', 100)),
+            'max_kb': str(self.settings.get('history_max_kb', 1024)),
+            'keyframe_every': str(self.settings.get('history_keyframe_every', 20)),
+            'interval_s': str(self.settings.get('history_interval_s', 60))
+        }
         with open(self.settings_file, 'w', encoding='utf-8') as configfile:
             config.write(configfile)
 
+    def toggle_perf(self):
+        """ 설정 메뉴에서 성능 측정을 켜거나 끕니다. 켤 때마다 기록을 새로 시작합니다. """
+        self.perf.enabled = self.perf_var.get()
+        if self.perf.enabled:
+            self.perf.reset()
+            self.perf.start_heartbeat(self.root)
+        else:
+            self.perf.stop_heartbeat(self.root)
+
+    def open_perf_stats(self):
+        """ 성능 통계 창을 띄웁니다. 창이 열려 있는 동안 1초마다 새로 고칩니다. """
+        stats_win = Toplevel(self.root)
+        stats_win.title("성능 통계")
+        stats_win.geometry("640x480")
+        stats_win.transient(self.root)
+
+        if not self.perf.enabled:
+            tk.Label(stats_win, text="성능 측정이 꺼져 있습니다. '설정 > 성능 측정'으로 켜세요.", font=self.ui_font).pack(pady=(10, 0))
+        report_text = tk.Text(stats_win, font=("Consolas", 10), wrap=tk.NONE)
+        report_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        refresh_after_id = None
+
+        def refresh():
+            nonlocal refresh_after_id
+            report_text.config(state=tk.NORMAL)
+            report_text.delete("1.0", tk.END)
+            report_text.insert("1.0", self.perf.format_report())
+            report_text.config(state=tk.DISABLED)
+            refresh_after_id = stats_win.after(1000, refresh)
+
+        def reset():
+            self.perf.reset()
+
+        def dump():
+            filepath = filedialog.asksaveasfilename(
+                parent=stats_win, title="성능 통계 저장", defaultextension=".json",
+                filetypes=[("JSON 파일", "*.json")]
+            )
+            if not filepath: return
+            try:
+                with open(filepath, "w", encoding="utf-8") as f:
+                    json.dump(self.perf.snapshot(), f, ensure_ascii=False, indent=4)
+            except OSError as e:
+                messagebox.showerror("오류", f"파일을 저장하는 중 오류가 발생했습니다:\n{e}", parent=stats_win)
+
+        def close():
+            if refresh_after_id is not None:
+                stats_win.after_cancel(refresh_after_id)
+            stats_win.destroy()
+
+        button_frame = tk.Frame(stats_win)
+        button_frame.pack(pady=(0, 10))
+        tk.Button(button_frame, text="초기화", command=reset, width=10).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="파일로 저장...", command=dump, width=12).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="닫기", command=close, width=10).pack(side=tk.LEFT, padx=5)
+        stats_win.protocol("WM_DELETE_WINDOW", close)
+        refresh()
+
     def open_font_settings(self):
         settings_win = Toplevel(self.root)
         settings_win.title("글꼴 설정")
@@ -186,7 +2724,10 @@ class MemoApp:
         settings_win.grab_set()
 
         tk.Label(settings_win, text="글꼴:", font=self.ui_font).grid(row=0, column=0, padx=10, pady=10, sticky="w")
-        font_families = sorted(font.families())
+        if self.font_families is None:
+            # 글꼴 목록은 시스템 전체를 훑으므로 처음 한 번만 가져옵니다.
+            self.font_families = sorted(font.families())
+        font_families = self.font_families
         font_var = tk.StringVar(value=self.content_font[0])
         font_combo = ttk.Combobox(settings_win, textvariable=font_var, values=font_families, state="readonly")
         font_combo.grid(row=0, column=1, padx=10, pady=10, sticky="ew")
@@ -220,72 +2761,501 @@ class MemoApp:
         apply_button.pack(side=tk.LEFT, padx=5)
 
     def import_memos(self):
-        """ JSON 파일 유효성 검사를 강화한 메모 가져오기 기능 """
+        """ JSON 또는 Excel 파일에서 메모를 가져옵니다. 파일 구조를 검사한 뒤 기존 메모를 덮어쓰거나 기존 메모와 병합합니다. """
+        if not self.memos_loaded: return
         filepath = filedialog.askopenfilename(
             title="메모 파일 가져오기",
-            filetypes=[("JSON 파일", "*.json"), ("모든 파일", "*.*")]
+            filetypes=[("JSON 파일", "*.json"), ("Excel 파일", "*.xlsx"), ("모든 파일", "*.*")]
         )
         if not filepath: return
+        is_excel = os.path.splitext(filepath)[1].lower() == ".xlsx"
+        if is_excel and not openpyxl_available():
+            messagebox.showerror("오류", "Excel 파일을 가져오려면 'openpyxl' 라이브러리가 필요합니다.\n(터미널에서 'pip install openpyxl' 실행)")
+            return
+
+        read_file = self.read_excel_import_file if is_excel else self.read_import_file
+        job = self.io_worker.submit(
+            lambda job: read_file(filepath, job),
+            on_done=self.on_import_loaded, on_error=self.on_import_error
+        )
+        self.show_progress("메모 가져오기", job)
+
+    @perf_timed
+    def read_import_file(self, filepath, job):
+        """ 작업 스레드에서 JSON 배열을 항목 단위로 읽으며 검사합니다. 빈 파일이면 None을 돌려줍니다.
 
+        검사한 메모는 바로 결과 목록에 넣고, IMPORT_BATCH_SIZE개마다 진행률과 취소 여부를 확인합니다.
+        결과는 한 목록으로 돌려주며, 덮어쓸지 병합할지는 UI 스레드에서 확인한 뒤 한 번에 반영합니다.
+        구조가 잘못된 항목을 만나면 그 위치를 알려 주고 멈춥니다.
+        """
+        total = os.path.getsize(filepath)
+        read_bytes = [0]
+        def on_read(size):
+            read_bytes[0] += size
+
+        new_memos = []
+        with open(filepath, "rb") as f:
+            try:
+                for i, m in enumerate(iter_json_array(f, on_read)):
+                    if not (isinstance(m, dict) and "title" in m and "content" in m):
+                        raise ValueError(f"{i + 1}번째 메모 항목의 구조가 올바르지 않습니다.\n('title', 'content' 키 필요)")
+                    new_memos.append(Memo.from_dict(m))
+                    if len(new_memos) % IMPORT_BATCH_SIZE == 0:
+                        job.check_cancelled()
+                        job.report_progress(min(read_bytes[0], total), total)
+            except EOFError:
+                return None
+        return new_memos
+
+    @perf_timed
+    def read_excel_import_file(self, filepath, job):
+        """ 작업 스레드에서 Excel 파일을 읽기 전용 모드로 한 행씩 읽어 메모로 바꿉니다.
+
+        내보내기와 같은 '제목', '내용' 머리글(또는 title, content)이 있는 열을 찾아 쓰며, 빈 행은 건너뜁니다.
+        IMPORT_BATCH_SIZE행마다 진행률과 취소 여부를 확인합니다. 데이터가 없으면 None을 돌려줍니다.
+        """
+        wb = load_openpyxl().load_workbook(filepath, read_only=True, data_only=True)
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                content = f.read()
-                if not content.strip():
-                    messagebox.showerror("오류", "파일이 비어있습니다.")
-                    return
-                new_memos = json.loads(content)
-
-            if not isinstance(new_memos, list):
-                raise TypeError("데이터가 리스트 형식이 아닙니다.")
-            
-            if not all(isinstance(m, dict) and "title" in m and "content" in m for m in new_memos):
-                raise ValueError("일부 메모 항목의 구조가 올바르지 않습니다.\n('title', 'content' 키 필요)")
-
-            if messagebox.askyesno("확인", "기존 메모를 덮어쓰고 가져오시겠습니까?"):
-                self.memos = new_memos
-                self.save_memos()
-                self.current_index = -1
-                self.title_entry.delete(0, tk.END)
-                self.content_text.delete("1.0", tk.END)
-                self.toggle_right_panel(False)
-                self.update_listbox()
-                messagebox.showinfo("성공", "메모를 성공적으로 가져왔습니다.")
-        except json.JSONDecodeError:
+            ws = wb["메모"] if "메모" in wb.sheetnames else wb.active
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return None
+            names = [str(cell).strip().lower() if cell is not None else "" for cell in header]
+            title_col = next((i for i, name in enumerate(names) if name in ("제목", "title")), None)
+            content_col = next((i for i, name in enumerate(names) if name in ("내용", "content")), None)
+            if title_col is None or content_col is None:
+                raise ValueError("첫 행에 '제목', '내용' 머리글이 있어야 합니다.")
+
+            def cell_text(row, col):
+                value = row[col] if col < len(row) else None
+                return "" if value is None else str(value)
+
+            total = ws.max_row or 0
+            new_memos = []
+            for row_number, row in enumerate(rows, start=2):
+                title, content = cell_text(row, title_col), cell_text(row, content_col)
+                if title or content:
+                    new_memos.append(Memo(title, content))
+                if row_number % IMPORT_BATCH_SIZE == 0:
+                    job.check_cancelled()
+                    job.report_progress(min(row_number, total), total)
+            return new_memos
+        finally:
+            # 읽기 전용 통합 문서는 파일을 열어 둔 채로 두므로 직접 닫아야 합니다.
+            wb.close()
+
+    def on_import_loaded(self, new_memos):
+        if new_memos is None:
+            messagebox.showerror("오류", "파일이 비어있습니다.")
+            return
+        answer = messagebox.askyesnocancel(
+            "확인", "기존 메모를 덮어쓰고 가져오시겠습니까?\n\n예: 덮어쓰기\n아니오: 기존 메모와 병합"
+        )
+        if answer is None: return
+        if answer:
+            self.replace_memos(new_memos)
+            return
+        added, identical, conflicts = self.merge_memos(new_memos)
+        message = f"새 메모 {added - len(conflicts)}개, 제목이 겹친 메모 {len(conflicts)}개를 추가했습니다.\n(같은 메모 {identical}개 건너뜀)"
+        if conflicts:
+            message += "\n\n제목을 바꿔 추가한 메모:\n" + "\n".join(conflicts[:10])
+            if len(conflicts) > 10:
+                message += f"\n... 외 {len(conflicts) - 10}개"
+        messagebox.showinfo("병합", message)
+
+    @perf_timed
+    def replace_memos(self, new_memos):
+        """ 메모 목록을 비우고 가져온 메모를 IMPORT_BATCH_SIZE개씩 나눠 넣습니다.
+
+        묶음 사이에는 root.after로 UI에 차례를 넘기며, 넣는 동안에는 memos_loaded를 꺼서 목록을 바꾸는 명령을 막습니다.
+        """
+        # 메모를 모두 덮어쓰므로 편집 중이던 내용은 버립니다.
+        self.content_modified = False
+        self.memos = []
+        self.undo_stack.clear()
+        self.store.record_replace()
+        self.search_index.reset()
+        self.positions_cache = None
+        self.current_index = -1
+        self.clear_editor()
+        self.update_listbox()
+        self.memos_loaded = False
+        self.import_batches = (new_memos, 0, None)
+        self.insert_import_batch()
+
+    @perf_timed
+    def insert_import_batch(self):
+        """ 가져온 메모 한 묶음을 insert_memos로 모델과 저장소에 넣습니다.
+
+        기록을 쌓는 저장소(저널, SQLite)는 묶음마다 저장해 한 번에 쓰는 양이 묶음 크기를 넘지 않게 하고,
+        매번 전체를 쓰는 JSON 저장소는 다 넣은 뒤 한 번만 저장합니다.
+        """
+        new_memos, start, _ = self.import_batches
+        end = min(start + IMPORT_BATCH_SIZE, len(new_memos))
+        self.insert_memos(len(self.memos), new_memos[start:end])
+        if not self.store.supersedes:
+            self.save_memos()
+        if end < len(new_memos):
+            self.search_status.config(text=f"가져온 메모를 넣는 중... {end * 100 // len(new_memos)}%")
+            self.import_batches = (new_memos, end, self.root.after(1, self.insert_import_batch))
+            return
+        self.import_batches = None
+        self.memos_loaded = True
+        self.search_status.config(text="")
+        if self.store.supersedes:
+            self.save_memos()
+        if not self.closing:
+            messagebox.showinfo("성공", "메모를 성공적으로 가져왔습니다.")
+
+    def finish_import(self):
+        """ 종료할 때 아직 넣지 못한 묶음을 바로 모두 넣어, 가져오다 만 상태로 저장되지 않게 합니다. """
+        while self.import_batches is not None:
+            after_id = self.import_batches[2]
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+            self.insert_import_batch()
+
+    @perf_timed
+    def merge_memos(self, new_memos):
+        """ 가져온 메모를 기존 메모 뒤에 병합하고 (추가한 수, 건너뛴 같은 메모 수, 바꾼 제목 목록)을 돌려줍니다.
+
+        기존 메모의 (제목+내용) 해시 집합과 제목 집합을 한 번 만들어 두고, 가져온 메모마다 O(1)로 분류합니다.
+        해시가 같으면 같은 메모로 보고 건너뛰고, 제목만 같고 내용이 다르면 제목 뒤에 '(가져옴)'을 붙여 추가합니다.
+        확인 창은 부르는 쪽에서 띄우므로 측정 시간에 사용자가 기다린 시간은 들어가지 않습니다.
+        """
+        self.commit_editor_content()
+        digests = set()
+        titles = set()
+        uids = {memo.uid for memo in self.memos}
+        for memo, content in zip(self.memos, self.store.iter_contents(self.memos)):
+            digests.add(memo_digest(memo.title, content))
+            titles.add(memo.title)
+
+        added = []
+        identical = 0
+        conflicts = []
+        for memo in new_memos:
+            title, content = memo.title, memo.content
+            digest = memo_digest(title, content)
+            if digest in digests:
+                identical += 1
+                continue
+            digests.add(digest)
+            if title in titles:
+                new_title = f"{title} (가져옴)"
+                n = 2
+                while new_title in titles:
+                    new_title = f"{title} (가져옴 {n})"
+                    n += 1
+                conflicts.append(new_title)
+                title = new_title
+            titles.add(title)
+            memo.title = title
+            # 같은 파일에서 갈라져 나온 메모는 기록을 섞지 않도록 새 uid를 받게 합니다.
+            if memo.uid in uids:
+                memo.uid = None
+            uids.add(memo.uid)
+            added.append(memo)
+
+        self.append_memos(added)
+        return len(added), identical, conflicts
+
+    def append_memos(self, new_memos):
+        """ 메모 여러 개를 목록 끝에 한 번에 추가합니다. 목록 갱신과 저장은 한 번만 합니다. """
+        if not new_memos: return
+        self.insert_memos(len(self.memos), new_memos)
+        self.save_memos()
+
+    def insert_memos(self, index, new_memos):
+        """ 메모 여러 개를 index 자리에 한 묶음으로 넣습니다. 저장소에는 한 번에 알리고 목록도 한 번만 다시 그립니다. """
+        self.memos[index:index] = new_memos
+        self.store.record_insert_block(index, new_memos)
+        for memo in new_memos:
+            self.search_index.add(memo)
+        self.positions_cache = None
+        if self.current_index >= index:
+            self.current_index += len(new_memos)
+        self.listbox.row_inserted(index, len(new_memos))
+
+    def import_folder(self):
+        """ 폴더 안의 .txt/.md 파일을 모두 읽어 메모 목록 끝에 추가합니다. """
+        if not self.memos_loaded: return
+        folder = filedialog.askdirectory(title="가져올 폴더 선택")
+        if not folder: return
+        job = self.io_worker.submit(
+            lambda job: self.read_folder_files(folder, job),
+            on_done=self.on_folder_loaded, on_error=self.on_import_error
+        )
+        self.show_progress("폴더에서 메모 가져오기", job)
+
+    @perf_timed
+    def read_folder_files(self, folder, job):
+        """ 작업 스레드에서 폴더를 훑고, 파일 읽기와 디코드는 스레드 풀에서 병렬로 처리합니다.
+
+        (메모 목록, 건너뛴 빈 파일 수, 읽지 못한 파일 목록)을 돌려줍니다. 메모는 경로 순서를 따릅니다.
+        """
+        paths = []
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith(FOLDER_IMPORT_EXTENSIONS):
+                    paths.append(os.path.join(dirpath, filename))
+            job.check_cancelled()
+
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        results = [None] * len(paths)
+        errors = []
+        with ThreadPoolExecutor() as executor:
+            futures = {executor.submit(memo_from_text_file, path): i for i, path in enumerate(paths)}
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    i = futures[future]
+                    try:
+                        results[i] = future.result()
+                    except OSError as e:
+                        errors.append(f"{paths[i]}: {e}")
+                    job.check_cancelled()
+                    job.report_progress(done, len(paths))
+            except JobCancelled:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+        new_memos = [memo for memo in results if memo is not None]
+        skipped = len(paths) - len(new_memos) - len(errors)
+        return new_memos, skipped, errors
+
+    def on_folder_loaded(self, result):
+        new_memos, skipped, errors = result
+        self.append_memos(new_memos)
+        message = f"메모 {len(new_memos)}개를 가져왔습니다.\n(빈 파일 {skipped}개 건너뜀, 오류 {len(errors)}개)"
+        if errors:
+            message += "\n\n" + "\n".join(errors[:5])
+        messagebox.showinfo("폴더 가져오기", message)
+
+    def on_import_error(self, e):
+        if isinstance(e, json.JSONDecodeError):
             messagebox.showerror("오류", "올바른 JSON 파일이 아닙니다. 파일 내용을 확인해주세요.")
-        except (TypeError, ValueError) as e:
+        elif isinstance(e, (TypeError, ValueError)):
             messagebox.showerror("오류", f"메모 파일 구조가 호환되지 않습니다.\n\n상세: {e}")
-        except Exception as e:
+        else:
             messagebox.showerror("오류", f"파일을 가져오는 중 오류가 발생했습니다:\n{e}")
 
-    def export_memos(self):
+    def export_memos(self, indices=None):
+        """ 메모를 JSON, TXT, Excel 파일로 내보냅니다. indices가 있으면 그 메모만 내보냅니다. """
+        if not self.memos_loaded: return
         filepath = filedialog.asksaveasfilename(
             title="메모 내보내기", defaultextension=".json",
             filetypes=[("JSON 파일", "*.json"), ("텍스트 파일", "*.txt"), ("Excel 파일", "*.xlsx")]
         )
         if not filepath: return
         file_ext = os.path.splitext(filepath)[1].lower()
+        if file_ext == ".xlsx" and not openpyxl_available():
+            messagebox.showerror("오류", "Excel로 내보내려면 'openpyxl' 라이브러리가 필요합니다.\n(터미널에서 'pip install openpyxl' 실행)")
+            return
+
+        # 저장을 먼저 제출하므로 저장소가 내보내기 전에 최신 상태가 됩니다.
+        self.flush_save()
+        total = len(self.memos) if indices is None else len(indices)
+        memos = self.store.export_view(self.memos, indices)
+        job = self.io_worker.submit(
+            lambda job: self.write_export_file(filepath, file_ext, memos, total, job),
+            on_done=lambda result: messagebox.showinfo("성공", f"메모를 {filepath} 파일로 성공적으로 내보냈습니다."),
+            on_error=lambda e: messagebox.showerror("오류", f"파일을 내보내는 중 오류가 발생했습니다:\n{e}")
+        )
+        self.show_progress("메모 내보내기", job)
+
+    def export_selected_memos(self):
+        indices = self.selected_memo_indices()
+        if not indices:
+            messagebox.showwarning("경고", "내보낼 메모를 선택하세요.")
+            return
+        self.export_memos(list(indices))
+
+    def export_search_results(self):
+        hits = self.find_memos(self.search_entry.get())
+        if not hits:
+            messagebox.showwarning("경고", "내보낼 검색 결과가 없습니다. 검색어를 먼저 입력하세요.")
+            return
+        self.export_memos(hits)
+
+    @perf_timed
+    def write_export_file(self, filepath, file_ext, memos, total, job):
+        """ 작업 스레드에서 메모를 하나씩 흘려 보내며 내보내기 파일을 씁니다. 취소되면 쓰다 만 파일을 지웁니다. """
+        def report(i):
+            if i % 500 == 0:
+                job.check_cancelled()
+                job.report_progress(i, total)
+
         try:
             if file_ext == ".json":
-                self.save_memos()
-                with open(self.file_path, 'r', encoding='utf-8') as f_in, open(filepath, 'w', encoding='utf-8') as f_out:
-                    f_out.write(f_in.read())
+                with open(filepath, "w", encoding="utf-8", buffering=EXPORT_BUFFER_SIZE) as f:
+                    write_json_array(f, (memo.to_dict() for memo in memos), report)
             elif file_ext == ".txt":
-                with open(filepath, "w", encoding="utf-8") as f:
-                    for memo in self.memos:
-                        f.write(f"제목: {memo['title']}\n" + "-"*20 + f"\n{memo['content']}\n\n" + "="*20 + "\n\n")
+                separator = "-" * 20
+                footer = "=" * 20
+                with open(filepath, "w", encoding="utf-8", buffering=EXPORT_BUFFER_SIZE) as f:
+                    for i, memo in enumerate(memos):
+                        # 큰 본문을 다른 문자열과 이어 붙이지 않고 그대로 버퍼에 씁니다.
+                        f.write(f"제목: {memo.title}\n{separator}\n")
+                        f.write(memo.content)
+                        f.write(f"\n\n{footer}\n\n")
+                        report(i)
             elif file_ext == ".xlsx":
-                if not openpyxl:
-                    messagebox.showerror("오류", "Excel로 내보내려면 'openpyxl' 라이브러리가 필요합니다.\n(터미널에서 'pip install openpyxl' 실행)")
-                    return
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = "메모"
+                # write_only 통합 문서는 행을 바로 파일로 흘려 보내므로 셀 객체가 메모리에 쌓이지 않습니다.
+                wb = load_openpyxl().Workbook(write_only=True)
+                ws = wb.create_sheet("메모")
                 ws.append(["제목", "내용"])
-                for memo in self.memos: ws.append([memo["title"], memo["content"]])
+                for i, memo in enumerate(memos):
+                    ws.append([memo.title, memo.content])
+                    report(i)
                 wb.save(filepath)
-            messagebox.showinfo("성공", f"메모를 {filepath} 파일로 성공적으로 내보냈습니다.")
-        except Exception as e:
-            messagebox.showerror("오류", f"파일을 내보내는 중 오류가 발생했습니다:\n{e}")
+        except JobCancelled:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            raise
+
+    def backup_memos(self):
+        """ 백업 폴더에 증분 백업을 만듭니다.
+
+        처음에는 전체 메모를 기준 파일로 쓰고, 그 뒤로는 manifest.json의 메모별 해시와 비교해
+        추가·변경·삭제된 부분만 변경분 파일로 씁니다. 복원할 때는 manifest.json의 순서대로 다시 적용합니다.
+        """
+        if not self.memos_loaded: return
+        folder = filedialog.askdirectory(title="백업 폴더 선택")
+        if not folder: return
+        self.flush_save()
+        total = len(self.memos)
+        memos = self.store.export_view(self.memos)
+        job = self.io_worker.submit(
+            lambda job: self.write_backup(folder, memos, total, job),
+            on_done=lambda message: messagebox.showinfo("백업", message),
+            on_error=lambda e: messagebox.showerror("오류", f"백업하는 중 오류가 발생했습니다:\n{e}")
+        )
+        self.show_progress("증분 백업", job)
+
+    @perf_timed
+    def write_backup(self, folder, memos, total, job):
+        """ 작업 스레드에서 기준 파일 또는 변경분 파일을 쓰고 manifest.json을 갱신합니다. 결과 메시지를 돌려줍니다. """
+        def report(i):
+            if i % 500 == 0:
+                job.check_cancelled()
+                job.report_progress(i, total)
+
+        def progress(memos):
+            for i, memo in enumerate(memos):
+                yield memo
+                report(i)
+
+        manifest_path = os.path.join(folder, BACKUP_MANIFEST)
+        manifest = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if not (isinstance(manifest, dict) and manifest.get("format") == BACKUP_FORMAT):
+                raise ValueError(f"{manifest_path} 파일은 메모 백업 목록이 아닙니다.")
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        digests = []
+        if manifest is None:
+            chain = []
+            filename = f"0001-base-{stamp}.json"
+            file_path = os.path.join(folder, filename)
+            def hashed():
+                for memo in memos:
+                    digests.append(memo_digest(memo.title, memo.content).hex())
+                    yield memo.to_dict()
+            with open(file_path + ".tmp", "w", encoding="utf-8", buffering=EXPORT_BUFFER_SIZE) as f:
+                write_json_array(f, hashed(), report)
+            message = f"메모 {len(digests)}개 전체를 백업했습니다."
+        else:
+            chain = manifest["chain"]
+            previous = manifest["digests"]
+            items, added = build_backup_delta(previous, progress(memos), digests)
+            if digests == previous:
+                return "지난 백업 이후 바뀐 메모가 없습니다."
+            filename = f"{len(chain) + 1:04d}-delta-{stamp}.json"
+            file_path = os.path.join(folder, filename)
+            with open(file_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"format": BACKUP_FORMAT, "count": len(digests), "items": items}, f, ensure_ascii=False)
+            kept = bytearray(len(previous))
+            for item in items:
+                if isinstance(item, list):
+                    kept[item[0]:item[0] + item[1]] = b"\1" * item[1]
+            message = f"변경분을 백업했습니다.\n(새로 쓴 메모 {added}개, 지난 백업에서 빠진 메모 {kept.count(0)}개)"
+
+        # 백업 파일을 먼저 완성한 뒤 목록을 바꾸므로, 중간에 멈춰도 목록은 이전 백업까지 그대로 유효합니다.
+        os.replace(file_path + ".tmp", file_path)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"format": BACKUP_FORMAT, "chain": chain + [filename], "digests": digests}, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+        return message
+
+    def restore_backup(self):
+        """ 백업 폴더의 manifest.json을 골라 기준 파일과 변경분을 차례로 적용한 메모를 가져옵니다. """
+        if not self.memos_loaded: return
+        manifest_path = filedialog.askopenfilename(
+            title="백업에서 복원",
+            filetypes=[("백업 목록", BACKUP_MANIFEST), ("모든 파일", "*.*")]
+        )
+        if not manifest_path: return
+        job = self.io_worker.submit(
+            lambda job: self.read_backup_chain(manifest_path, job),
+            on_done=self.on_import_loaded, on_error=self.on_import_error
+        )
+        self.show_progress("백업에서 복원", job)
+
+    @perf_timed
+    def read_backup_chain(self, manifest_path, job):
+        """ 작업 스레드에서 백업 목록의 파일들을 순서대로 적용하고, 결과를 목록의 해시와 맞춰 봅니다. """
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if not (isinstance(manifest, dict) and manifest.get("format") == BACKUP_FORMAT):
+            raise ValueError("메모 백업 목록(manifest.json) 파일이 아닙니다.")
+        folder = os.path.dirname(manifest_path)
+        chain = manifest["chain"]
+        memos = self.read_import_file(os.path.join(folder, chain[0]), job) or []
+        for filename in chain[1:]:
+            job.check_cancelled()
+            with open(os.path.join(folder, filename), encoding="utf-8") as f:
+                memos = apply_backup_delta(memos, json.load(f))
+        digests = [memo_digest(memo.title, memo.content).hex() for memo in memos]
+        if digests != manifest["digests"]:
+            raise ValueError("복원한 메모가 백업 목록의 해시와 일치하지 않습니다.")
+        return memos
+
+    def show_progress(self, title, job):
+        """ 작업 진행률과 취소 버튼을 보여주는 창을 띄웁니다. 작업이 끝나면 자동으로 닫힙니다. """
+        progress_win = Toplevel(self.root)
+        progress_win.title(title)
+        progress_win.geometry("300x120")
+        progress_win.resizable(False, False)
+        progress_win.transient(self.root)
+        progress_win.grab_set()
+
+        status_label = tk.Label(progress_win, text="처리 중...", font=self.ui_font)
+        status_label.pack(pady=(10, 5))
+        progress_bar = ttk.Progressbar(progress_win, mode="indeterminate", length=260)
+        progress_bar.pack(padx=10)
+        progress_bar.start(10)
+
+        def on_progress(done, total):
+            if total:
+                progress_bar.stop()
+                progress_bar.config(mode="determinate", maximum=total, value=done)
+                status_label.config(text=f"{done} / {total}")
+
+        def cancel():
+            job.cancel()
+            status_label.config(text="취소하는 중...")
+            cancel_button.config(state=tk.DISABLED)
+
+        cancel_button = tk.Button(progress_win, text="취소", command=cancel, width=10)
+        cancel_button.pack(pady=10)
+        progress_win.protocol("WM_DELETE_WINDOW", cancel)
+
+        job.on_progress = on_progress
+        job.on_finish = progress_win.destroy
 
     def toggle_right_panel(self, enabled):
         state = tk.NORMAL if enabled else tk.DISABLED
@@ -293,89 +3263,879 @@ class MemoApp:
         self.title_entry.config(state=state, bg=bg_color)
         self.content_text.config(state=state, bg=bg_color)
 
+    def create_store(self):
+        """ settings.ini의 [Storage] format 값에 맞는 저장소를 만듭니다. (json, journal, sqlite)
+
+        json과 journal 형식은 compression 값(none, zlib, gzip, lzma)에 따라 스냅샷을 압축해 씁니다.
+        """
+        compression = self.settings['storage_compression']
+        level = self.settings['compression_level']
+        if self.settings['storage_format'] == 'journal':
+            return JournalMemoStore(self.file_path, self.settings['journal_compact_kb'] * 1024, compression, level)
+        if self.settings['storage_format'] == 'sqlite':
+            return SqliteMemoStore(self.file_path)
+        return JsonMemoStore(self.file_path, compression, level)
+
+    @perf_timed
     def load_memos(self):
-        if not os.path.exists(self.file_path): return []
-        try:
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-             return []
+        with self.lock:
+            memos = self.store.load()
+            if self.watch is not None:
+                self.watch.known = self.watch.scan()[0]
+                self.sync_base = [(memo, memo.title, memo.content) for memo in memos]
+        return memos
 
+    @perf_timed
     def save_memos(self):
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(self.memos, f, ensure_ascii=False, indent=4)
+        """ 저장을 작업 스레드에 맡깁니다. 예약된 자동 저장은 취소됩니다. """
+        self.cancel_autosave()
+        self.commit_editor_content()
+        self.dirty = False
+        self.dirty_since = None
+        payload = self.store.prepare_save(self.memos)
+        sync_base = self.sync_snapshot()
+        self.io_worker.submit(
+            lambda job: self.write_store(payload, sync_base), on_done=self.on_save_done, on_error=self.on_save_error,
+            key="save" if self.store.supersedes else None
+        )
+        self.snapshot_history()
 
-    def update_listbox(self):
-        self.listbox.delete(0, tk.END)
+    def sync_snapshot(self):
+        """ 저장할 때 파일과 맞춘 상태로 기억할 (메모, 제목, 내용) 목록을 UI 스레드에서 만듭니다. 지켜보지 않으면 None """
+        if self.watch is None: return None
+        return [(memo, memo.title, memo.content) for memo in self.memos]
+
+    @perf_timed
+    def write_store(self, payload, sync_base=None):
+        """ 작업 스레드에서 저장소에 씁니다. 측정이 켜져 있으면 저장 횟수와 쓴 바이트 수도 셉니다.
+
+        파일을 지켜보는 중이면 잠금을 잡은 채로, 마지막으로 맞춘 뒤 다른 곳에서 파일이 바뀌지 않았을 때만 씁니다.
+        sync_base는 payload를 만들 때 sync_snapshot으로 만든 목록이며, 쓴 뒤 파일과 맞춘 상태로 기억합니다.
+        """
+        with self.lock:
+            if self.watch is not None:
+                state, changed = self.watch.scan()
+                if changed:
+                    raise ExternalChangeError("다른 곳에서 메모 파일을 바꿨습니다.")
+                self.watch.known = state
+            before = self.store.bytes_written
+            self.store.write(payload)
+            if self.watch is not None:
+                self.watch.note_written()
+                self.sync_base = sync_base
+        if self.perf.enabled:
+            self.perf.count("store_writes")
+            self.perf.count("bytes_written", self.store.bytes_written - before)
+
+    def on_save_done(self, result):
+        self.save_failed = False
+
+    def on_save_error(self, e):
+        # 변경 상태를 되돌리고, 더 입력하지 않아도 SAVE_RETRY_MS 뒤에 다시 저장해 봅니다.
+        self.dirty = True
+        self.dirty_since = time.monotonic()
+        self.cancel_autosave()
+        self.autosave_after_id = self.root.after(self.SAVE_RETRY_MS, self.flush_save)
+        if isinstance(e, ExternalChangeError):
+            # 저널 형식은 이번 기록을 이미 꺼냈으므로, 합친 뒤에는 전체를 다시 씁니다.
+            self.store.record_replace()
+            self.external_conflict = True
+            self.check_external_change()
+            return
+        if self.save_failed: return
+        self.save_failed = True
+        messagebox.showerror("오류", f"메모를 저장하는 중 오류가 발생했습니다:\n{e}")
+
+    def schedule_external_check(self):
+        if self.watch is not None and self.settings['watch_ms'] > 0 and not self.closing:
+            self.external_after_id = self.root.after(self.settings['watch_ms'], self.poll_external_change)
+
+    def poll_external_change(self):
+        """ 주기적으로 파일의 수정 시간과 크기만 확인하고, 달라졌을 때만 작업 스레드에서 자세히 봅니다. """
+        self.external_after_id = None
+        if self.watch.stat_changed():
+            self.check_external_change()
+        self.schedule_external_check()
+
+    def check_external_change(self):
+        if self.watch is None or self.external_check_job is not None or not self.memos_loaded or self.closing: return
+        self.external_check_job = self.io_worker.submit(
+            self.read_external_change, on_done=self.on_external_change, on_error=self.on_external_change_error
+        )
+
+    def read_external_change(self, job):
+        """ 작업 스레드에서 파일 내용이 정말 바뀌었는지 해시로 확인하고, 바뀌었으면 다시 읽습니다.
+
+        합칠 때 UI 스레드가 멈추지 않도록 양쪽 메모의 해시도 여기서 구합니다. 바뀌지 않았으면 None을 돌려줍니다.
+        """
+        with self.lock:
+            state, changed = self.watch.scan()
+            if not changed:
+                self.watch.known = state
+                return None
+            try:
+                theirs = self.store.read_current()
+            except (ValueError, IOError, KeyError, TypeError):
+                return (state, None)
+        # sync_base는 저장이 성공할 때만 바뀌는데, 파일이 바뀐 동안에는 저장이 거절되므로 합칠 때까지 그대로입니다.
+        base = self.sync_base
+        base_digests = [memo_digest(title, content) for _, title, content in base]
+        theirs_digests = [memo_digest(memo.title, memo.content) for memo in theirs]
+        if theirs_digests == base_digests:
+            # 직접 쓴 뒤라 파일 해시가 없던 경우, 같은 내용으로 다시 쓰기만 했는지는 여기서 가립니다.
+            with self.lock:
+                self.watch.known = state
+            return None
+        return (state, (base, base_digests, theirs, theirs_digests))
+
+    def on_external_change(self, result):
+        self.external_check_job = None
+        if result is None: return
+        state, change = result
+        self.watch.known = state
+        self.external_conflict = False
+        if change is None:
+            # 파일이 없어졌거나 깨졌으면 지우지 않고 이 창의 메모로 다시 씁니다.
+            self.search_status.config(text="메모 파일을 읽을 수 없어 이 창의 메모로 다시 저장합니다.")
+            self.store.record_replace()
+            self.mark_dirty()
+            return
+        self.apply_external_change(*change)
+
+    def on_external_change_error(self, e):
+        self.external_check_job = None
+        self.search_status.config(text=f"바뀐 메모 파일을 확인하지 못했습니다: {e}")
+
+    @perf_timed
+    def apply_external_change(self, base, base_digests, theirs, theirs_digests):
+        """ 다른 곳에서 바뀐 메모만 목록에 반영합니다.
+
+        이쪽에서 고치고 있는 메모는 건드리지 않고 저쪽 것을 따로 남깁니다. 열어 두기만 한 메모가 바뀌었으면 다시 보여 줍니다.
+        """
+        self.commit_editor_content()
+        keep = self.memos[self.current_index] if self.current_index != -1 else None
+        # 목록의 선택과 활성 행은 자리로 기억하므로, 합친 뒤 같은 메모를 가리키도록 메모로 적어 둡니다.
+        selected = [self.memos[i] for i in self.listbox.curselection() if i < len(self.memos)]
+        active = self.listbox.active_index
+        active_memo = self.memos[active] if 0 <= active < len(self.memos) else None
+        merged, sync_base, updated, conflicts = merge_external_change(
+            base, base_digests, self.memos, theirs, theirs_digests, keep
+        )
+        old_ids = {memo.id for memo in self.memos}
+        new_ids = {memo.id for memo in merged}
         for memo in self.memos:
-            self.listbox.insert(tk.END, memo["title"])
+            if memo.id not in new_ids:
+                self.search_index.remove(memo)
+        for memo in merged:
+            if memo.id not in old_ids:
+                self.search_index.add(memo)
+        for memo in updated:
+            self.search_index.mark_stale(memo)
+        added, removed = len(new_ids - old_ids), len(old_ids - new_ids)
+        self.memos = merged
+        self.sync_base = sync_base
+        self.positions_cache = None
+        self.update_listbox()
+        positions = self.memo_positions()
+        self.listbox.selection_clear(0, tk.END)
+        for memo in selected:
+            if memo.id in positions:
+                self.listbox.selection_set(positions[memo.id])
+        self.listbox.activate(positions[active_memo.id] if active_memo is not None and active_memo.id in positions else -1)
+        self.listbox.anchor_index = self.listbox.active_index
+        if keep is not None:
+            self.current_index = positions[keep.id]
+            self.listbox.selection_set(self.current_index)
+            self.listbox.activate(self.current_index)
+            if keep in updated:
+                self.title_entry.delete(0, tk.END)
+                self.title_entry.insert(0, keep.title)
+                self.show_memo_content(keep.content)
+        # 이쪽에만 있는 변경이 남았으면 합친 결과를 통째로 다시 씁니다.
+        in_sync = len(merged) == len(sync_base) and all(
+            memo is entry[0] and memo.title == entry[1] and memo.content == entry[2]
+            for memo, entry in zip(merged, sync_base)
+        )
+        if self.dirty or not in_sync:
+            self.store.record_replace()
+            self.mark_dirty()
+        text = f"다른 곳에서 바뀐 메모를 반영했습니다. (수정 {len(updated)}, 추가 {added}, 삭제 {removed})"
+        if conflicts:
+            text += f"\n양쪽에서 고친 메모 {conflicts}개는 '(다른 곳에서 바뀜)'을 붙여 따로 남겼습니다."
+        self.search_status.config(text=text)
 
+    def save_before_exit(self):
+        """ 종료할 때 마지막 저장이 다른 곳의 변경과 부딪혔으면 바로 합친 뒤 씁니다. """
+        for _ in range(3):
+            result = self.read_external_change(None)
+            if result is not None:
+                self.on_external_change(result)
+            self.cancel_autosave()
+            self.commit_editor_content()
+            try:
+                self.write_store(self.store.prepare_save(self.memos), self.sync_snapshot())
+            except ExternalChangeError:
+                self.store.record_replace()
+                continue
+            except Exception as e:
+                messagebox.showerror("오류", f"메모를 저장하는 중 오류가 발생했습니다:\n{e}")
+            return
+
+    def mark_dirty(self):
+        """ 메모가 변경되었음을 표시하고 자동 저장을 예약합니다.
+
+        마지막 입력 후 autosave_delay_ms 동안 입력이 없으면 저장하며,
+        입력이 계속되더라도 첫 변경 후 autosave_max_delay_ms 안에는 반드시 저장합니다.
+        """
+        now = time.monotonic()
+        if not self.dirty:
+            self.dirty = True
+            self.dirty_since = now
+        self.cancel_autosave()
+        elapsed_ms = int((now - self.dirty_since) * 1000)
+        remaining_ms = max(0, self.settings['autosave_max_delay_ms'] - elapsed_ms)
+        delay_ms = min(self.settings['autosave_delay_ms'], remaining_ms)
+        self.autosave_after_id = self.root.after(delay_ms, self.flush_save)
+
+    def cancel_autosave(self):
+        if self.autosave_after_id is not None:
+            self.root.after_cancel(self.autosave_after_id)
+            self.autosave_after_id = None
+
+    def flush_save(self):
+        """ 저장되지 않은 변경이 있을 때만 저장합니다. """
+        self.autosave_after_id = None
+        if self.dirty:
+            self.save_memos()
+
+    def note_history(self, memo):
+        """ 메모를 고치기 직전에 불러, 다음 기록 때 남길 메모로 표시합니다. 처음이면 고치기 전 상태도 함께 기억합니다. """
+        if self.history is None or memo.id in self.history_pending: return
+        memo.ensure_uid()
+        self.history_pending[memo.id] = (memo, (memo.title, memo.content, memo.modified))
+
+    def snapshot_history(self, force=False):
+        """ 바뀐 메모의 지금 상태를 작업 스레드에서 기록합니다.
+
+        연속 편집 중에는 메모마다 history_interval_s에 한 번만 남기고, force면 (다른 메모로 옮길 때, 종료할 때) 바로 남깁니다.
+        """
+        if not self.history_pending: return
+        now = time.monotonic()
+        interval = self.settings['history_interval_s']
+        items = []
+        for memo_id, (memo, before) in list(self.history_pending.items()):
+            if not force and now - self.history_times.get(memo_id, -interval) < interval:
+                continue
+            del self.history_pending[memo_id]
+            # 내용을 늦게 읽는 저장소에서 이미 내려놓은 메모는 남길 내용이 없습니다.
+            if memo.content is None or before[1] is None:
+                continue
+            self.history_times[memo_id] = now
+            items.append((memo.uid, memo.title, memo.content, memo.modified, before))
+        if items:
+            self.io_worker.submit(lambda job: self.history.record_all(items), on_error=self.on_history_error)
+
+    def on_history_error(self, e):
+        # 기록은 부가 기능이므로 편집을 막지 않고 상태줄에만 알립니다.
+        self.search_status.config(text=f"수정 기록을 남기지 못했습니다: {e}")
+
+    def open_history(self):
+        """ 열려 있는 메모의 수정 기록 창을 띄웁니다. 기록은 밀린 기록 작업이 끝난 뒤 작업 스레드에서 읽습니다. """
+        if self.history is None:
+            messagebox.showinfo("메모 기록", "수정 기록이 꺼져 있습니다. settings.ini의 [History] enabled로 켤 수 있습니다.")
+            return
+        if self.current_index == -1:
+            messagebox.showwarning("경고", "기록을 볼 메모를 선택하세요.")
+            return
+        self.commit_editor_content()
+        self.snapshot_history(force=True)
+        memo = self.memos[self.current_index]
+        if memo.uid is None:
+            messagebox.showinfo("메모 기록", "이 메모는 아직 수정 기록이 없습니다.")
+            return
+        uid = memo.uid
+        self.io_worker.submit(
+            lambda job: self.history.versions(uid), on_done=lambda versions: self.show_history(memo, versions),
+            on_error=lambda e: messagebox.showerror("오류", f"수정 기록을 읽는 중 오류가 발생했습니다:\n{e}")
+        )
+
+    def show_history(self, memo, versions):
+        if not versions:
+            messagebox.showinfo("메모 기록", "이 메모는 아직 수정 기록이 없습니다.")
+            return
+        history_win = Toplevel(self.root)
+        history_win.title(f"메모 기록 - {memo.title}")
+        history_win.geometry("720x480")
+        history_win.transient(self.root)
+
+        # 최신 판이 위에 오도록 거꾸로 보여줍니다.
+        versions = versions[::-1]
+        pane = PanedWindow(history_win, sashrelief=tk.RAISED, orient=tk.HORIZONTAL)
+        pane.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        version_list = tk.Listbox(pane, font=self.ui_font, exportselection=False)
+        pane.add(version_list, width=240)
+        preview_text = tk.Text(pane, font=self.content_font, state=tk.DISABLED)
+        pane.add(preview_text)
+        for rev, timestamp, title, _ in versions:
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp)) if timestamp else "시간 모름"
+            version_list.insert(tk.END, f"{rev}판  {when}  {title}")
+
+        def selected():
+            indices = version_list.curselection()
+            return versions[indices[0]] if indices else None
+
+        def show(event=None):
+            version = selected()
+            if version is None: return
+            preview_text.config(state=tk.NORMAL)
+            preview_text.delete("1.0", tk.END)
+            preview_text.insert("1.0", version[3])
+            preview_text.config(state=tk.DISABLED)
+
+        def restore():
+            version = selected()
+            if version is None: return
+            index = self.memo_positions().get(memo.id)
+            if index is None or self.memos[index] is not memo:
+                messagebox.showwarning("경고", "이 메모는 이미 지워졌습니다.", parent=history_win)
+                return
+            self.restore_revision(index, version[2], version[3])
+            history_win.destroy()
+
+        version_list.bind("<<ListboxSelect>>", show)
+        button_frame = tk.Frame(history_win)
+        button_frame.pack(pady=(0, 10))
+        tk.Button(button_frame, text="이 판으로 되돌리기", command=restore, width=16).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="닫기", command=history_win.destroy, width=10).pack(side=tk.LEFT, padx=5)
+        version_list.selection_set(0)
+        show()
+
+    def restore_revision(self, index, title, content):
+        """ 메모를 예전 판의 제목과 내용으로 되돌립니다. 되돌리기도 하나의 새 판으로 남습니다. """
+        self.commit_editor_content()
+        memo = self.memos[index]
+        if memo.content is None:
+            memo.content = self.get_memo_content(index)
+        self.note_history(memo)
+        memo.title = title
+        memo.content = content
+        memo.touch()
+        self.store.record_update(index, memo)
+        self.search_index.mark_stale(memo)
+        self.listbox.row_changed(index)
+        if index == self.current_index:
+            self.title_entry.delete(0, tk.END)
+            self.title_entry.insert(0, title)
+            self.show_memo_content(content)
+        self.snapshot_history(force=True)
+        self.mark_dirty()
+
+    def get_memo_content(self, index):
+        """ 메모 내용을 돌려줍니다. 저장소가 내용을 늦게 읽는 경우 필요할 때 가져옵니다. """
+        content = self.memos[index].content
+        if content is None:
+            content = self.store.load_content(index)
+        return content
+
+    @perf_timed
+    def update_listbox(self):
+        self.listbox.refresh()
+
+    @perf_timed
     def on_memo_select(self, event):
         selected_indices = self.listbox.curselection()
         if not selected_indices: return
-        self.current_index = selected_indices[0]
+        self.commit_editor_content()
+        previous_index = self.current_index
+        # 여러 개를 골랐으면 마지막으로 누른 메모를 엽니다.
+        active_index = self.listbox.active_index
+        self.current_index = active_index if self.listbox.selection_includes(active_index) else selected_indices[0]
         memo = self.memos[self.current_index]
+        # 이전 메모의 내용을 내려놓기 전에 편집 내용을 검색 색인과 수정 기록에 반영합니다.
+        self.search_index.refresh_stale()
+        self.snapshot_history(force=True)
+        if self.store.lazy_content:
+            # 메모리 사용을 일정하게 유지하도록 열려 있는 메모의 내용만 들고 있습니다.
+            if previous_index != -1 and previous_index != self.current_index and previous_index < len(self.memos):
+                self.memos[previous_index].content = None
+            memo.content = self.get_memo_content(self.current_index)
         self.toggle_right_panel(True)
         self.title_entry.delete(0, tk.END)
-        self.title_entry.insert(0, memo["title"])
+        self.title_entry.insert(0, memo.title)
+        self.show_memo_content(memo.content)
+
+    def clear_editor(self):
+        """ 선택한 메모가 없을 때 편집 영역을 비우고 잠급니다. """
+        self.cancel_content_load()
+        self.content_pages = None
+        self.content_modified = False
+        self.set_large_memo_status("")
+        self.title_entry.delete(0, tk.END)
+        # 쪽 단위로 보던 메모는 content_text가 잠겨 있으므로 먼저 풀어야 지워집니다.
+        self.content_text.config(state=tk.NORMAL)
+        self.content_text.delete("1.0", tk.END)
+        self.toggle_right_panel(False)
+
+    def show_memo_content(self, content):
+        """ 메모 내용을 content_text에 채웁니다.
+
+        large_memo_kb보다 큰 메모는 root.after로 조금씩 나눠 넣어 화면이 멈추지 않게 하고,
+        paged_memo_kb보다 큰 메모는 쪽 단위 읽기 전용으로 보여줍니다.
+        Tk는 아주 긴 한 줄을 그리는 데 오래 걸리므로 그런 줄이 있으면 알리고 줄 바꿈을 끕니다.
+        """
+        self.cancel_content_load()
+        self.content_pages = None
+        long_line_chars = self.settings['long_line_chars']
+        long_line = has_long_line(content, long_line_chars)
+        self.content_notes = "아주 긴 줄이 있어 줄 바꿈 없이 표시합니다." if long_line else ""
+        self.content_text.config(wrap=tk.NONE if long_line else tk.CHAR, state=tk.NORMAL)
+        self.content_text.delete("1.0", tk.END)
+
+        if len(content) >= self.settings['paged_memo_kb'] * 1024:
+            self.content_pages = split_pages(content, CONTENT_PAGE_SIZE)
+            self.show_content_page(0)
+        elif len(content) >= self.settings['large_memo_kb'] * 1024:
+            self.load_content_chunks(content, 0, len(content))
+        else:
+            self.content_text.insert("1.0", content)
+            self.content_text.edit_modified(False)
+            self.set_large_memo_status(self.content_notes)
+            self.highlight_search_hits()
+
+    def show_content_page(self, page):
+        """ 쪽 단위로 보는 큰 메모에서 page번째 쪽을 보여줍니다. """
+        if self.content_pages is None or not 0 <= page < len(self.content_pages): return
+        self.cancel_content_load()
+        self.content_page = page
+        start, end = self.content_pages[page]
+        self.content_text.config(state=tk.NORMAL)
         self.content_text.delete("1.0", tk.END)
-        self.content_text.insert("1.0", memo["content"])
+        self.load_content_chunks(self.memos[self.current_index].content, start, end)
+
+    def load_content_chunks(self, content, start, end):
+        """ content[start:end]를 CONTENT_CHUNK_SIZE씩 나눠 content_text 끝에 넣습니다. 넣는 동안에는 편집을 막습니다. """
+        chunk_end = min(start + CONTENT_CHUNK_SIZE, end)
+        self.content_text.config(state=tk.NORMAL)
+        self.content_text.insert(tk.END, content[start:chunk_end])
+        self.content_text.config(state=tk.DISABLED)
+        size = f"{len(content) / (1 << 20):.1f}MB"
+        if chunk_end < end:
+            self.set_large_memo_status(f"큰 메모({size})를 불러오는 중... {chunk_end * 100 // len(content)}%")
+            self.content_load_after_id = self.root.after(1, self.load_content_chunks, content, chunk_end, end)
+            return
+
+        self.content_load_after_id = None
+        self.content_text.edit_modified(False)
+        if self.content_pages is None:
+            self.content_text.config(state=tk.NORMAL)
+            status = ""
+        else:
+            status = f"아주 큰 메모({size})라 읽기 전용으로 나눠 보여줍니다. ({self.content_page + 1}/{len(self.content_pages)}쪽)"
+        self.set_large_memo_status("\n".join(text for text in (status, self.content_notes) if text))
+        self.highlight_search_hits()
+
+    def cancel_content_load(self):
+        if self.content_load_after_id is not None:
+            self.root.after_cancel(self.content_load_after_id)
+            self.content_load_after_id = None
+
+    def set_large_memo_status(self, text):
+        """ 큰 메모 안내줄을 보이거나 숨깁니다. 쪽 이동 버튼은 쪽 단위로 볼 때만 씁니다. """
+        if not text:
+            self.large_memo_frame.pack_forget()
+            return
+        self.large_memo_label.config(text=text)
+        paged = self.content_pages is not None
+        self.prev_page_button.config(state=tk.NORMAL if paged and self.content_page > 0 else tk.DISABLED)
+        self.next_page_button.config(state=tk.NORMAL if paged and self.content_page < len(self.content_pages) - 1 else tk.DISABLED)
+        self.large_memo_frame.pack(fill=tk.X, before=self.content_text)
 
     def add_memo(self):
-        new_memo = {"title": "새 메모", "content": ""}
+        if not self.memos_loaded: return
+        now = int(time.time())
+        new_memo = Memo("새 메모", "", now, now)
         insert_pos = self.current_index + 1 if self.current_index != -1 else len(self.memos)
         self.memos.insert(insert_pos, new_memo)
-        self.update_listbox()
+        self.store.record_insert(insert_pos, new_memo)
+        self.search_index.add(new_memo)
+        self.positions_cache = None
+        self.listbox.row_inserted(insert_pos)
         self.listbox.selection_clear(0, tk.END)
         self.listbox.selection_set(insert_pos)
         self.listbox.activate(insert_pos)
+        self.listbox.see(insert_pos)
         self.on_memo_select(None)
-        self.save_memos()
+        self.mark_dirty()
 
     def remove_memo(self):
-        if self.current_index == -1:
+        """ 고른 메모를 모두 한 번에 지웁니다. 확인은 한 번만 묻고, 편집 > 되돌리기로 되살릴 수 있습니다. """
+        indices = self.selected_memo_indices()
+        if not self.memos_loaded or not indices:
             messagebox.showwarning("경고", "삭제할 메모를 선택하세요.")
             return
-        if messagebox.askyesno("확인", "선택한 메모를 제거하시겠습니까?"):
-            del self.memos[self.current_index]
+        question = "선택한 메모를 제거하시겠습니까?" if len(indices) == 1 else f"선택한 메모 {len(indices)}개를 제거하시겠습니까?"
+        if messagebox.askyesno("확인", question):
+            self.push_undo("delete", self.delete_memos(indices))
+            self.search_status.config(text=f"메모 {len(indices)}개를 지웠습니다. 목록에서 Ctrl+Z로 되돌릴 수 있습니다.")
+
+    def delete_memos(self, indices):
+        """ 메모 여러 개를 한 번에 지우고, 되돌릴 때 쓰도록 (자리, 메모) 목록을 돌려줍니다.
+
+        목록은 한 번만 다시 만들고 다시 그리며, 자동 저장도 한 번만 예약합니다.
+        """
+        indices = sorted(indices)
+        if not indices: return []
+        self.commit_editor_content()
+        removed = []
+        for index in indices:
+            memo = self.memos[index]
+            if memo.content is None:
+                # 되돌릴 때 다시 넣을 수 있도록 늦게 읽는 내용도 가져 둡니다.
+                memo.content = self.get_memo_content(index)
+            removed.append((index, memo))
+        first = indices[0]
+        deleted = set(indices)
+        self.memos[first:] = [memo for i, memo in enumerate(self.memos[first:], first) if i not in deleted]
+        # 뒤에서부터 알려야 앞쪽 자리가 바뀌지 않습니다.
+        for index in reversed(indices):
+            self.store.record_delete(index)
+        for _, memo in removed:
+            self.search_index.remove(memo)
+        self.positions_cache = None
+        self.listbox.rows_deleted(indices)
+        if self.current_index in deleted:
             self.current_index = -1
-            self.title_entry.delete(0, tk.END)
-            self.content_text.delete("1.0", tk.END)
-            self.toggle_right_panel(False)
-            self.update_listbox()
-            self.save_memos()
+            self.clear_editor()
+        elif self.current_index != -1:
+            self.current_index -= bisect.bisect_left(indices, self.current_index)
+        self.mark_dirty()
+        return removed
+
+    def duplicate_memos(self):
+        """ 고른 메모들을 복제해 마지막으로 고른 메모 바로 뒤에 한 묶음으로 넣습니다. 복제본은 새 uid를 받습니다. """
+        indices = self.selected_memo_indices()
+        if not self.memos_loaded or not indices:
+            messagebox.showwarning("경고", "복제할 메모를 선택하세요.")
+            return
+        self.commit_editor_content()
+        now = int(time.time())
+        copies = [Memo(f"{self.memos[i].title} (사본)", self.get_memo_content(i), now, now) for i in indices]
+        position = indices[-1] + 1
+        self.insert_memos(position, copies)
+        if self.store.lazy_content:
+            # 저장소가 저장 전까지 내용을 들고 있으므로 열지 않은 복제본의 내용은 내려놓습니다.
+            for memo in copies:
+                memo.content = None
+        self.push_undo("insert", copies)
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(position, position + len(copies) - 1)
+        self.listbox.activate(position)
+        self.listbox.see(position)
+        self.on_memo_select(None)
+        self.mark_dirty()
+
+    def select_all_memos(self):
+        self.listbox.focus_set()
+        self.listbox.select_all()
+
+    def push_undo(self, op, entries):
+        if not entries: return
+        self.undo_stack.append((op, entries))
+        del self.undo_stack[:-UNDO_LIMIT]
+
+    def undo_memo_change(self):
+        """ 마지막 메모 목록 작업(여러 메모 지우기, 복제, 옮기기)을 되돌립니다. """
+        if not self.memos_loaded: return "break"
+        if not self.undo_stack:
+            self.search_status.config(text="되돌릴 작업이 없습니다.")
+            return "break"
+        op, entries = self.undo_stack.pop()
+        if op == "delete":
+            self.restore_memos(entries)
+            self.search_status.config(text=f"지운 메모 {len(entries)}개를 되살렸습니다.")
+        elif op == "move":
+            count = self.restore_order(entries)
+            self.search_status.config(text=f"옮긴 메모 {count}개를 원래 자리로 되돌렸습니다.")
+        else:
+            positions = self.memo_positions()
+            indices = [positions[memo.id] for memo in entries if memo.id in positions]
+            self.delete_memos(indices)
+            self.search_status.config(text=f"복제한 메모 {len(indices)}개를 지웠습니다.")
+        return "break"
+
+    def restore_order(self, moved):
+        """ move_memos가 기록한 (옮기기 전 자리, 메모)대로 메모를 원래 자리에 되돌리고 되돌린 메모 수를 돌려줍니다.
+
+        원래 자리와 지금 자리가 모두 이어져 있으면 move_block 한 번으로 되돌립니다. 아니면 메모들을 목록 끝에
+        모은 뒤, 앞쪽 자리부터 하나씩 끝에서 꺼내 넣으므로 이미 넣은 메모는 다시 밀리지 않습니다.
+        """
+        self.commit_editor_content()
+        positions = self.memo_positions()
+        moved = [(index, memo) for index, memo in moved if memo.id in positions]
+        if not moved: return 0
+        current = self.memos[self.current_index] if self.current_index != -1 else None
+        memos = [memo for _, memo in moved]
+        indices = sorted(positions[memo.id] for memo in memos)
+        count, size = len(self.memos), len(moved)
+        first = moved[0][0]
+
+        def move(block, target):
+            move_block(self.memos, block, target)
+            self.store.record_move(block, target)
+
+        was_run = moved[-1][0] - first == size - 1
+        is_run = indices[-1] - indices[0] == size - 1
+        if was_run and is_run and [self.memos[i] for i in indices] == memos:
+            if first != indices[0]:
+                move(indices, first if first < indices[0] else first + size)
+        else:
+            if indices[0] != count - size:
+                move(indices, count)
+            tail = self.memos[count - size:]
+            for index, memo in moved:
+                tail_start = count - len(tail)
+                source = tail_start + tail.index(memo)
+                target = min(index, tail_start)
+                if target != source:
+                    move([source], target)
+                tail.remove(memo)
+
+        self.positions_cache = None
+        positions = self.memo_positions()
+        if current is not None:
+            self.current_index = positions[current.id]
+        self.listbox.selection_clear(0, tk.END)
+        for memo in memos:
+            self.listbox.selection_set(positions[memo.id])
+        self.listbox.activate(self.current_index if current in memos else positions[memos[0].id])
+        self.listbox.see(positions[memos[0].id])
+        self.listbox.refresh()
+        self.mark_dirty()
+        return size
+
+    def restore_memos(self, removed):
+        """ delete_memos가 돌려준 (자리, 메모)를 원래 자리에 다시 넣고 되살린 메모를 고릅니다. """
+        self.commit_editor_content()
+        current = self.memos[self.current_index] if self.current_index != -1 else None
+        for index, memo in removed:
+            index = min(index, len(self.memos))
+            self.memos.insert(index, memo)
+            self.store.record_insert(index, memo)
+            self.search_index.add(memo)
+            if self.store.lazy_content:
+                memo.content = None
+        self.positions_cache = None
+        positions = self.memo_positions()
+        if current is not None:
+            self.current_index = positions[current.id]
+        self.listbox.selection_clear(0, tk.END)
+        for _, memo in removed:
+            self.listbox.selection_set(positions[memo.id])
+        self.listbox.see(positions[removed[0][1].id])
+        self.listbox.refresh()
+        self.mark_dirty()
+
+    def selected_memo_indices(self):
+        """ 목록에서 고른 메모들. 고른 것이 없으면 편집 중인 메모입니다. """
+        indices = self.listbox.curselection()
+        if not indices and self.current_index != -1:
+            indices = (self.current_index,)
+        return indices
 
     def move_memo_up(self):
-        if self.current_index > 0:
-            self.memos.insert(self.current_index - 1, self.memos.pop(self.current_index))
-            self.current_index -= 1
-            self.update_listbox_selection()
+        indices = self.selected_memo_indices()
+        if indices and indices[0] > 0:
+            self.move_memos(indices, indices[0] - 1)
 
     def move_memo_down(self):
-        if 0 <= self.current_index < len(self.memos) - 1:
-            self.memos.insert(self.current_index + 1, self.memos.pop(self.current_index))
-            self.current_index += 1
-            self.update_listbox_selection()
+        indices = self.selected_memo_indices()
+        if indices and indices[-1] < len(self.memos) - 1:
+            self.move_memos(indices, indices[-1] + 2)
 
-    def update_listbox_selection(self):
-        self.update_listbox()
+    def move_memos(self, indices, target):
+        """ indices의 메모들을 순서대로 모아 target 자리(옮기기 전 기준) 앞으로 옮깁니다.
+
+        여러 메모를 옮겨도 한 번의 이동으로 저장소에 기록하고, 목록 갱신과 자동 저장 예약도 한 번만 합니다.
+        """
+        if not self.memos_loaded or not indices or target is None: return
+        indices = sorted(indices)
+        count = len(indices)
+        start = block_start(indices, target)
+        # 이미 그 자리에 모여 있으면 바뀌는 것이 없습니다.
+        if start == indices[0] and indices[-1] - indices[0] == count - 1: return
+        current = self.memos[self.current_index] if self.current_index != -1 else None
+        low = min(indices[0], target)
+        high = max(indices[-1] + 1, target)
+        self.push_undo("move", [(i, self.memos[i]) for i in indices])
+        move_block(self.memos, indices, target)
+        self.store.record_move(indices, target)
+        self.positions_cache = None
+        if current is not None and low <= self.current_index < high:
+            self.current_index = self.memos.index(current, low, high)
         self.listbox.selection_clear(0, tk.END)
-        self.listbox.selection_set(self.current_index)
-        self.listbox.activate(self.current_index)
-        self.save_memos()
+        self.listbox.selection_set(start, start + count - 1)
+        self.listbox.activate(self.current_index if start <= self.current_index < start + count else start)
+        self.listbox.see(start)
+        self.listbox.refresh()
+        self.mark_dirty()
 
+    @perf_timed
     def update_memo_realtime(self, event):
+        """ 제목 입력에 맞춰 메모 제목을 고칩니다. 내용 변경은 on_content_modified가 따로 추적합니다. """
         if self.current_index == -1 or self.title_entry.cget('state') == tk.DISABLED: return
         title = self.title_entry.get()
-        content = self.content_text.get("1.0", tk.END).strip()
-        self.memos[self.current_index] = {"title": title, "content": content}
-        self.listbox.delete(self.current_index)
-        self.listbox.insert(self.current_index, title)
-        self.listbox.selection_set(self.current_index)
-        self.save_memos()
+        memo = self.memos[self.current_index]
+        # 방향키, Shift, Ctrl 등 제목이 바뀌지 않는 키 입력은 무시합니다.
+        if memo.title == title: return
+        self.note_history(memo)
+        memo.title = title
+        memo.touch()
+        self.store.record_update(self.current_index, memo)
+        self.search_index.mark_stale(memo)
+        self.listbox.row_changed(self.current_index)
+        self.mark_dirty()
+
+    @perf_timed
+    def on_content_modified(self, event):
+        """ content_text의 수정 표시가 켜지면 편집 중인 메모를 바뀐 것으로 표시합니다.
+
+        키 입력마다 전체 내용을 읽지 않고 표시만 남기므로 메모 길이와 상관없이 비용이 일정합니다.
+        실제 내용은 저장하거나 검색 색인을 고칠 때 commit_editor_content가 한 번 읽어 옵니다.
+        """
+        # 표시를 끌 때도 <<Modified>>가 다시 발생하므로 켜진 경우만 처리합니다.
+        if not self.content_text.edit_modified(): return
+        self.content_text.edit_modified(False)
+        if self.current_index == -1 or self.content_load_after_id is not None or self.content_pages is not None: return
+        memo = self.memos[self.current_index]
+        if not self.content_modified:
+            self.note_history(memo)
+        memo.touch()
+        if not self.content_modified:
+            self.content_modified = True
+            self.search_index.mark_stale(memo)
+        self.mark_dirty()
+
+    @perf_timed
+    def commit_editor_content(self):
+        """ content_text가 편집 중인 메모보다 새로우면 내용을 읽어 메모와 저장소에 반영합니다. """
+        if not self.content_modified: return
+        self.content_modified = False
+        if self.current_index == -1: return
+        memo = self.memos[self.current_index]
+        # Text는 항상 끝에 줄바꿈 하나를 덧붙이므로 그것만 빼고, 사용자가 넣은 줄바꿈은 그대로 둡니다.
+        memo.content = self.content_text.get("1.0", "end-1c")
+        self.store.record_update(self.current_index, memo)
+
+    def memo_positions(self):
+        """ Memo.id에서 목록 위치로 가는 표. 순서가 바뀔 때까지 재사용합니다. """
+        if self.positions_cache is None:
+            self.positions_cache = {memo.id: i for i, memo in enumerate(self.memos)}
+        return self.positions_cache
+
+    @perf_timed
+    def find_memos(self, query):
+        """ query를 제목이나 내용에 포함한 메모의 위치를 목록 순서대로 돌려줍니다. (대소문자 무시) """
+        query = query.lower()
+        if not query: return []
+        self.commit_editor_content()
+        self.search_index.refresh_stale()
+        if not self.search_index.built:
+            self.search_status.config(text="검색 색인을 만드는 중...")
+            self.search_status.update_idletasks()
+            self.search_index.build(self.memos, self.store.iter_contents(self.memos))
+        positions = self.memo_positions()
+        hits = []
+        # 제목에서 찾은 메모는 내용을 읽지 않고, 나머지 후보의 내용은 저장소에서 묶어서 읽습니다.
+        content_checks = []
+        for index in sorted(positions[memo.id] for memo in self.search_index.candidates(query, self.memos)):
+            if query in self.memos[index].title.lower():
+                hits.append(index)
+            else:
+                content_checks.append(index)
+        for index, content in zip(content_checks, self.store.iter_contents(self.memos, content_checks)):
+            if query in content.lower():
+                hits.append(index)
+        hits.sort()
+        return hits
+
+    def on_search_key(self, event):
+        if event.keysym in ("Return", "Escape"): return
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(250, self.run_search)
+
+    def run_search(self):
+        """ 검색어가 바뀌었을 때 결과 수를 보여주고 현재 메모의 일치 부분을 강조합니다. """
+        self.search_after_id = None
+        query = self.search_entry.get()
+        if query == self.search_query: return
+        self.search_query = query
+        hits = self.find_memos(query)
+        self.search_status.config(text=f"{len(hits)}개 메모에서 찾음" if query else "")
+        self.highlight_search_hits()
+
+    def search_next(self, direction):
+        """ 현재 메모 다음(또는 이전)의 검색 결과 메모로 이동합니다. 끝에 닿으면 반대쪽 끝으로 넘어갑니다. """
+        self.search_query = self.search_entry.get()
+        hits = self.find_memos(self.search_query)
+        if not hits:
+            self.search_status.config(text="찾는 내용이 없습니다." if self.search_query else "")
+            return "break"
+        if direction > 0:
+            target = next((i for i in hits if i > self.current_index), hits[0])
+        else:
+            target = next((i for i in reversed(hits) if i < self.current_index), hits[-1])
+        self.search_status.config(text=f"{hits.index(target) + 1} / {len(hits)}")
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(target)
+        self.listbox.activate(target)
+        self.listbox.see(target)
+        self.on_memo_select(None)
+        return "break"
+
+    def clear_search(self, event=None):
+        self.search_entry.delete(0, tk.END)
+        self.search_query = ""
+        self.search_status.config(text="")
+        self.highlight_search_hits()
+        return "break"
+
+    def highlight_search_hits(self):
+        """ content_text에서 검색어와 일치하는 부분을 강조하고 첫 번째 위치를 보여줍니다.
+
+        일치 위치는 Text의 search -all 한 번으로 모두 받고, 앞에서부터 SEARCH_HIGHLIGHT_LIMIT개까지만
+        tag_add 한 번으로 강조합니다. 짧은 검색어로 큰 메모를 열어도 Tcl 호출 수가 일치 수에 비례하지 않습니다.
+        """
+        text = self.content_text
+        text.tag_remove("search_hit", "1.0", tk.END)
+        if not self.search_query or self.current_index == -1: return
+        counts = tk.StringVar(self.root)
+        starts = [str(pos) for pos in text.tk.splitlist(text.tk.call(
+            text._w, "search", "-all", "-nocase", "-count", str(counts), "--", self.search_query, "1.0", tk.END
+        ))]
+        if not starts: return
+        lengths = text.tk.splitlist(text.tk.getvar(str(counts)))
+        ranges = []
+        for pos, length in zip(starts[:SEARCH_HIGHLIGHT_LIMIT], lengths):
+            if int(length):
+                ranges += [pos, f"{pos}+{length}c"]
+        if ranges:
+            text.tag_add("search_hit", *ranges)
+        text.see(starts[0])
 
     def on_closing(self):
-        self.save_memos()
+        self.closing = True
+        if self.external_after_id is not None:
+            self.root.after_cancel(self.external_after_id)
+            self.external_after_id = None
+        self.finish_import()
+        self.flush_save()
+        self.commit_editor_content()
+        self.snapshot_history(force=True)
+        self.io_worker.close()
+        if self.external_conflict:
+            self.save_before_exit()
+        self.store.close()
         self.save_settings()
         self.root.destroy()
 
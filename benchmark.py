@@ -0,0 +1,371 @@
+""" 알파카 메모장 성능 측정 스크립트
+
+합성 메모장(기본 1천/1만/10만 개, 한글·영문 섞인 짧은 메모와 몇 MB짜리 메모)을 만들어
+저장소와 화면 쪽의 실제 코드 경로 시간을 재고, 중앙값과 백분위수를 JSON으로 저장합니다.
+
+    python benchmark.py                          # 기본 크기 전부
+    python benchmark.py --sizes 1000,10000 --repeat 20
+    python benchmark.py --baseline old.json      # 이전 결과와 중앙값 비교
+
+화면 측정에는 Tk 창이 필요합니다. DISPLAY가 없으면 Xvfb로 가상 화면을 띄우고,
+Xvfb도 없으면 화면 측정은 건너뛰고 저장소 측정만 합니다. (xvfb-run으로 실행해도 됩니다.)
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "an.v250707.py")
+STORAGE_FORMATS = ("json", "json.gzip", "journal", "sqlite")
+EXPORT_FORMATS = (".json", ".txt", ".xlsx")
+
+KOREAN_WORDS = ["메모", "회의", "일정", "알파카", "오늘", "내일", "정리", "할 일", "아이디어", "참고",
+                "프로젝트", "장보기", "연락처", "독서", "운동", "여행", "예산", "보고서", "검토", "다음 주"]
+ENGLISH_WORDS = ["note", "meeting", "todo", "draft", "review", "budget", "travel", "project", "idea",
+                 "reference", "weekly", "report", "backlog", "release", "fix", "plan", "summary", "log"]
+
+def load_app_module(path):
+    """ 파일 이름에 점이 들어 있어 import 문으로 불러올 수 없으므로 경로로 모듈을 불러옵니다. """
+    spec = importlib.util.spec_from_file_location("alpaca_notepad", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def make_notebook(count, seed, large_size=2 << 20):
+    """ count개의 합성 메모를 만듭니다. 1만 개마다 하나(최소 하나)는 large_size 글자 안팎의 큰 메모입니다.
+
+    돌려주는 값: (메모 목록, 큰 메모 위치 목록)
+    """
+    rng = random.Random(seed)
+    words = KOREAN_WORDS + ENGLISH_WORDS
+    paragraphs = [" ".join(rng.choice(words) for _ in range(rng.randint(5, 60))) for _ in range(256)]
+    large_count = max(1, count // 10000)
+    large_positions = sorted({int((j + 0.5) * count / large_count) for j in range(large_count)})
+    large = set(large_positions)
+
+    memos = []
+    for i in range(count):
+        title = f"{rng.choice(KOREAN_WORDS)} {rng.choice(ENGLISH_WORDS)} {i}"
+        if i in large:
+            parts = []
+            size = 0
+            while size < large_size:
+                paragraph = rng.choice(paragraphs)
+                parts.append(paragraph)
+                size += len(paragraph) + 1
+            content = "\n".join(parts)
+        else:
+            content = "\n".join(rng.choice(paragraphs) for _ in range(rng.randint(1, 8)))
+        memos.append({"title": title, "content": content})
+    return memos, large_positions
+
+def summarize(samples):
+    """ 초 단위 측정값을 밀리초 단위 통계로 바꿉니다. 백분위수는 nearest-rank 방식입니다. """
+    ordered = sorted(samples)
+    def percentile(q):
+        return ordered[max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "n": len(ordered),
+        "median_ms": ms(percentile(50)),
+        "p90_ms": ms(percentile(90)),
+        "p99_ms": ms(percentile(99)),
+        "min_ms": ms(ordered[0]),
+        "max_ms": ms(ordered[-1]),
+        "mean_ms": ms(sum(ordered) / len(ordered)),
+    }
+
+def measure(repeat, func, setup=None):
+    """ setup()을 부른 뒤 func()의 실행 시간을 repeat번 잽니다. setup의 반환값은 func에 넘깁니다. """
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg) if setup else func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+@contextlib.contextmanager
+def patched(obj, **attrs):
+    """ 측정 중에만 대화 상자 함수 같은 속성을 바꿔 둡니다. """
+    saved = {name: getattr(obj, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(obj, name, value)
+
+def write_notebook(an, memos, path):
+    with open(path, "w", encoding="utf-8") as f:
+        an.write_json_array(f, memos)
+
+def bench_storage(an, memos, workdir, repeat):
+    """ 저장소별 load_memos와 저장(prepare_save + write) 시간을 잽니다. 화면이 필요 없습니다. """
+    results = {}
+    rng = random.Random(1)
+    classes = {
+        "json": lambda path: an.JsonMemoStore(path),
+        "json.gzip": lambda path: an.JsonMemoStore(path, "gzip", 6),
+        "journal": lambda path: an.JournalMemoStore(path, 1024 * 1024),
+        "sqlite": lambda path: an.SqliteMemoStore(path),
+    }
+    for storage_format in STORAGE_FORMATS:
+        folder = os.path.join(workdir, f"storage-{storage_format}")
+        os.makedirs(folder)
+        path = os.path.join(folder, "memos.json")
+        write_notebook(an, memos, path)
+        if storage_format == "sqlite":
+            # 처음 한 번은 memos.json을 DB로 옮기므로 따로 잽니다.
+            store = classes[storage_format](path)
+            results[f"load_memos[{storage_format}].migrate"] = summarize(measure(1, store.load))
+            store.close()
+
+        loaded = []
+        def load():
+            store = classes[storage_format](path)
+            loaded.append((store, store.load()))
+        samples = []
+        for _ in range(repeat):
+            for store, _ in loaded:
+                store.close()
+            loaded.clear()
+            start = time.perf_counter()
+            load()
+            samples.append(time.perf_counter() - start)
+        results[f"load_memos[{storage_format}]"] = summarize(samples)
+
+        store, loaded_memos = loaded[-1]
+        def edit_one():
+            index = rng.randrange(len(loaded_memos))
+            memo = loaded_memos[index]
+            if memo.content is None:
+                memo.content = store.load_content(index)
+            memo.content += "!"
+            store.record_update(index, memo)
+        bytes_before = store.bytes_written
+        results[f"save_memos[{storage_format}]"] = summarize(
+            measure(repeat, lambda _: store.write(store.prepare_save(loaded_memos)), setup=edit_one)
+        )
+        results[f"save_memos[{storage_format}]"]["bytes_per_save"] = (store.bytes_written - bytes_before) // repeat
+
+        def move_one():
+            # 메모 하나를 아무 자리로나 멀리 옮긴 뒤의 저장 시간
+            index = rng.randrange(len(loaded_memos))
+            target = rng.randrange(len(loaded_memos) + 1)
+            an.move_block(loaded_memos, [index], target)
+            store.record_move([index], target)
+        results[f"move_memo[{storage_format}]"] = summarize(
+            measure(repeat, lambda _: store.write(store.prepare_save(loaded_memos)), setup=move_one)
+        )
+        store.close()
+    return results
+
+def start_virtual_display():
+    """ DISPLAY가 없으면 Xvfb를 띄우고 그 프로세스를 돌려줍니다. 띄울 수 없으면 None입니다. """
+    if os.environ.get("DISPLAY") or sys.platform.startswith("win") or sys.platform == "darwin":
+        return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        return None
+    for number in range(99, 120):
+        if os.path.exists(f"/tmp/.X{number}-lock"):
+            continue
+        process = subprocess.Popen([xvfb, f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{number}"):
+                os.environ["DISPLAY"] = f":{number}"
+                return process
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+        process.terminate()
+    return None
+
+def bench_ui(an, memos, large_positions, workdir, repeat, heavy_repeat):
+    """ 실제 MemoApp을 Tk 창에 띄워 화면 쪽 코드 경로의 시간을 잽니다. 파일 대화 상자와 알림 창은 바꿔 둡니다. """
+    tk = an.tk
+    folder = os.path.join(workdir, "ui")
+    os.makedirs(folder)
+    write_notebook(an, memos, os.path.join(folder, "memos.json"))
+    cwd = os.getcwd()
+    os.chdir(folder)
+    results = {}
+    errors = []
+    rng = random.Random(2)
+    root = tk.Tk()
+    try:
+        dialogs = {"save": None, "open": None}
+        with patched(an.messagebox,
+                     showinfo=lambda *a, **k: None, showwarning=lambda *a, **k: None,
+                     showerror=lambda *a, **k: errors.append(a),
+                     askyesno=lambda *a, **k: True, askyesnocancel=lambda *a, **k: True), \
+             patched(an.filedialog,
+                     asksaveasfilename=lambda *a, **k: dialogs["save"],
+                     askopenfilename=lambda *a, **k: dialogs["open"]):
+            start = time.perf_counter()
+            app = an.MemoApp(root)
+            root.update()
+            results["startup.first_paint"] = summarize([time.perf_counter() - start])
+            # 메모는 창을 그린 뒤 작업 스레드에서 불러오므로 목록이 채워질 때까지 기다립니다.
+            while not app.memos_loaded:
+                root.update()
+                time.sleep(0.0005)
+            root.update_idletasks()
+            results["startup.interactive"] = summarize([time.perf_counter() - start])
+
+            def settle():
+                """ 작업 스레드와 나눠 넣기 작업이 끝날 때까지 이벤트 루프를 돌립니다. """
+                while app.io_worker.outstanding or app.content_load_after_id is not None:
+                    root.update()
+                    time.sleep(0.0005)
+                root.update_idletasks()
+
+            def select(index):
+                app.listbox.selection_clear(0, tk.END)
+                app.listbox.selection_set(index)
+                app.on_memo_select(None)
+                settle()
+
+            def run(name, repeat, func, setup=None):
+                samples = measure(repeat, func, setup)
+                if errors:
+                    raise RuntimeError(f"{name}: {errors[0]}")
+                results[name] = summarize(samples)
+
+            run("update_listbox", repeat, lambda: (app.update_listbox(), root.update_idletasks()))
+            small = [i for i in range(len(app.memos)) if i not in set(large_positions)]
+            run("on_memo_select", repeat, select, setup=lambda: rng.choice(small))
+            run("on_memo_select[large]", heavy_repeat, select, setup=lambda: rng.choice(large_positions))
+
+            select(rng.choice(small))
+            def type_title():
+                app.title_entry.insert(tk.END, "가")
+                app.update_memo_realtime(None)
+                root.update_idletasks()
+            run("update_memo_realtime[title]", repeat, type_title)
+            def type_content():
+                app.content_text.insert(tk.INSERT, "가")
+                root.update()
+            run("content_keystroke", repeat, type_content)
+            select(large_positions[0])
+            run("content_keystroke[large]", repeat, type_content)
+
+            select(len(app.memos) // 2)
+            run("move_memo_up", repeat, lambda: (app.move_memo_up(), root.update_idletasks()))
+            run("move_memo_down", repeat, lambda: (app.move_memo_down(), root.update_idletasks()))
+
+            def save(_=None):
+                app.save_memos()
+                settle()
+            run("save_memos", repeat, save, setup=lambda: type_content())
+
+            for ext in EXPORT_FORMATS:
+                if ext == ".xlsx" and not an.openpyxl_available():
+                    continue
+                def export(ext=ext):
+                    dialogs["save"] = os.path.join(folder, "export" + ext)
+                    app.export_memos()
+                    settle()
+                run(f"export_memos[{ext[1:]}]", heavy_repeat, export)
+
+            for ext in (".json", ".xlsx"):
+                if not os.path.exists("export" + ext):
+                    continue
+                def import_file(ext=ext):
+                    dialogs["open"] = os.path.join(folder, "export" + ext)
+                    app.import_memos()
+                    settle()
+                run(f"import_memos[{ext[1:]}]", heavy_repeat, import_file)
+
+            app.on_closing()
+    finally:
+        os.chdir(cwd)
+        try:
+            root.destroy()
+        except tk.TclError:
+            pass
+    return results
+
+def print_results(results, baseline=None):
+    for size, entries in results.items():
+        print(f"\n== 메모 {size}개 ==")
+        for name, stats in entries.items():
+            line = f"  {name:<32} 중앙값 {stats['median_ms']:>10.3f} ms   p90 {stats['p90_ms']:>10.3f} ms"
+            old = (baseline or {}).get(size, {}).get(name)
+            if old and old["median_ms"] > 0:
+                ratio = stats["median_ms"] / old["median_ms"]
+                line += f"   기준 대비 {ratio:.2f}배" + ("  <- 느려짐" if ratio > 1.2 else "")
+            if "bytes_per_save" in stats:
+                line += f"   저장당 {stats['bytes_per_save'] / 1024:,.1f} KB"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="알파카 메모장 성능 측정")
+    parser.add_argument("--app", default=DEFAULT_APP, help="측정할 메모장 파일 (기본: an.v250707.py)")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="메모 개수 목록 (쉼표로 구분)")
+    parser.add_argument("--repeat", type=int, default=30, help="가벼운 작업의 반복 횟수")
+    parser.add_argument("--heavy-repeat", type=int, default=3, help="가져오기, 내보내기처럼 무거운 작업의 반복 횟수")
+    parser.add_argument("--seed", type=int, default=250707, help="합성 메모장의 난수 시드")
+    parser.add_argument("--no-ui", action="store_true", help="화면 측정을 건너뜁니다")
+    parser.add_argument("--output", default="benchmark_results.json", help="결과 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    args = parser.parse_args()
+
+    an = load_app_module(args.app)
+    display = None if args.no_ui else start_virtual_display()
+    ui_enabled = not args.no_ui and bool(os.environ.get("DISPLAY") or sys.platform.startswith("win") or sys.platform == "darwin")
+    if not args.no_ui and not ui_enabled:
+        print("화면(DISPLAY)과 Xvfb가 없어 화면 측정은 건너뜁니다.", file=sys.stderr)
+
+    results = {}
+    try:
+        for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+            memos, large_positions = make_notebook(size, args.seed)
+            workdir = tempfile.mkdtemp(prefix=f"alpaca-bench-{size}-")
+            try:
+                entries = bench_storage(an, memos, workdir, args.repeat)
+                if ui_enabled:
+                    entries.update(bench_ui(an, memos, large_positions, workdir, args.repeat, args.heavy_repeat))
+                results[str(size)] = entries
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        if display is not None:
+            display.terminate()
+
+    report = {
+        "meta": {
+            "app": os.path.basename(args.app),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+            "heavy_repeat": args.heavy_repeat,
+            "seed": args.seed,
+            "ui": ui_enabled,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+    print(f"\n결과를 {args.output}에 저장했습니다.")
+
+if __name__ == "__main__":
+    main()